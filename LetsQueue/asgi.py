@@ -13,4 +13,28 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'LetsQueue.settings')
 
-application = get_asgi_application()
+# Initialise Django before importing consumers, which load models
+django_asgi_app = get_asgi_application()
+
+from channels.routing import ProtocolTypeRouter, URLRouter
+from channels.security.websocket import OriginValidator
+from django.conf import settings
+
+import private_lobby.routing
+import public_lobby.routing
+
+if getattr(settings, 'CORS_ALLOW_ALL_ORIGINS', False):
+    allowed_origins = ['*']
+else:
+    allowed_origins = settings.CORS_ALLOWED_ORIGINS + settings.ALLOWED_HOSTS
+
+application = ProtocolTypeRouter({
+    'http': django_asgi_app,
+    'websocket': OriginValidator(
+        URLRouter(
+            public_lobby.routing.websocket_urlpatterns
+            + private_lobby.routing.websocket_urlpatterns
+        ),
+        allowed_origins,
+    ),
+})
@@ -12,7 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 from corsheaders.defaults import default_headers, default_methods
-from decouple import config
+from decouple import Csv, config
 import dj_database_url
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -51,6 +51,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.CompressionMiddleware',
     'corsheaders.middleware.CorsMiddleware',  
     'django.middleware.security.SecurityMiddleware',
     "whitenoise.middleware.WhiteNoiseMiddleware",   
@@ -60,15 +62,28 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.AnonTokenMiddleware',
+    'core.middleware.ReplicaPinMiddleware',
 ]
 
 REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
-    'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
-        'rest_framework.renderers.BrowsableAPIRenderer',
-    ],
+    # orjson-backed JSON; the browsable API and its HTML forms only in DEBUG
+    'DEFAULT_RENDERER_CLASSES': ['core.renderers.FastJSONRenderer'] + (
+        ['rest_framework.renderers.BrowsableAPIRenderer'] if DEBUG else []
+    ),
+    'DEFAULT_PARSER_CLASSES': ['core.parsers.FastJSONParser'] + (
+        ['rest_framework.parsers.FormParser', 'rest_framework.parsers.MultiPartParser'] if DEBUG else []
+    ),
+    # Test requests are sent as JSON, like the frontend's
+    'TEST_REQUEST_DEFAULT_FORMAT': 'json',
+    # Token-bucket budgets per caller (core.throttling.TokenBucketThrottle):
+    # burst size / refill period, shared by public and private lobbies
+    'DEFAULT_THROTTLE_RATES': {
+        'lobby-create': config('THROTTLE_CREATE_RATE', default='10/min'),
+        'lobby-join': config('THROTTLE_JOIN_RATE', default='30/min'),
+    },
 }
 
 # CORS Settings (adjust for production)
@@ -96,16 +111,62 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'LetsQueue.wsgi.application'
+ASGI_APPLICATION = 'LetsQueue.asgi.application'
+
+
+# Channel layer for lobby WebSocket events
+# The in-memory layer only reaches sockets held by the same process. With
+# several workers or nodes, point CHANNEL_LAYER_URL at Redis (requires the
+# channels-redis package) to fan events out over pub/sub.
+
+if config('CHANNEL_LAYER_URL', default=None):
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.pubsub.RedisPubSubChannelLayer',
+            'CONFIG': {'hosts': [config('CHANNEL_LAYER_URL')]},
+        }
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        }
+    }
 
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Connections are kept open for DB_CONN_MAX_AGE seconds (0 closes them
+# after every request) and checked before reuse when DB_CONN_HEALTH_CHECKS
+# is on. DB_POOL=True switches PostgreSQL to Django's built-in connection
+# pool instead; it needs psycopg 3 with the pool extra
+# (pip install "psycopg[binary,pool]") and replaces persistent connections.
+
+DB_CONN_MAX_AGE = config('DB_CONN_MAX_AGE', default=60, cast=int)
+DB_CONN_HEALTH_CHECKS = config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool)
+DB_POOL = config('DB_POOL', default=False, cast=bool)
+
+
+def database_config(url):
+    database = dj_database_url.parse(
+        url,
+        conn_max_age=0 if DB_POOL else DB_CONN_MAX_AGE,
+        conn_health_checks=DB_CONN_HEALTH_CHECKS,
+    )
+    if DB_POOL:
+        database.setdefault('OPTIONS', {})['pool'] = {
+            'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+            'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+            # Seconds a request waits for a free connection before erroring
+            'timeout': config('DB_POOL_TIMEOUT', default=10, cast=int),
+        }
+    return database
+
+
 if config('DATABASE_URL', default=None):
     DATABASES = {
-        'default': dj_database_url.config(
-            default=config('DATABASE_URL')
-        )
+        'default': database_config(config('DATABASE_URL'))
     }
 else:
     DATABASES = {
@@ -115,6 +176,79 @@ else:
         }
     }
 
+# Read replicas: comma-separated URLs in DATABASE_REPLICA_URLS become the
+# aliases replica1, replica2, ... Safe reads made while serving a request
+# go to a random replica (core.db_router.ReplicaRouter); a caller that
+# writes is pinned to the primary for REPLICA_PIN_SECONDS. Tests mirror
+# the replicas onto default. Locally, two SQLite files work; create the
+# replica's tables with migrate --database replica1:
+#   DATABASE_URL=sqlite:///primary.sqlite3
+#   DATABASE_REPLICA_URLS=sqlite:///replica.sqlite3
+
+DATABASE_REPLICAS = []
+for number, url in enumerate(config('DATABASE_REPLICA_URLS', default='', cast=Csv()), start=1):
+    alias = f'replica{number}'
+    DATABASES[alias] = database_config(url)
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['core.db_router.ReplicaRouter']
+REPLICA_PIN_SECONDS = config('REPLICA_PIN_SECONDS', default=5, cast=int)
+
+
+# Cache
+# LocMemCache is per process; set CACHE_URL to a Redis URL to share cached
+# responses and their invalidations across workers.
+
+if config('CACHE_URL', default=None):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': config('CACHE_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'letsqueue',
+        }
+    }
+
+# Reverse proxies in front of the app that append to X-Forwarded-For
+# (1 behind Render's load balancer); the client IP is read that many
+# entries from the right, and REMOTE_ADDR is used when this is 0
+TRUSTED_PROXY_COUNT = config('TRUSTED_PROXY_COUNT', default=0, cast=int)
+
+# Where throttle buckets live: 'cache' shares them across workers through
+# the cache above, 'local' keeps up to THROTTLE_LOCAL_MAX_KEYS per process
+THROTTLE_STORE = config('THROTTLE_STORE', default='cache' if config('CACHE_URL', default=None) else 'local')
+THROTTLE_LOCAL_MAX_KEYS = config('THROTTLE_LOCAL_MAX_KEYS', default=10000, cast=int)
+
+# Seconds a cached public lobby list page may be served; also bounds how
+# long a lobby that lapsed without being swept can stay listed
+LOBBY_LIST_CACHE_TIMEOUT = config('LOBBY_LIST_CACHE_TIMEOUT', default=30, cast=int)
+
+# Seconds before a quick-match pool is reloaded from the database; bounds
+# how long lobbies created or changed by other workers stay invisible
+MATCHMAKING_POOL_TTL = config('MATCHMAKING_POOL_TTL', default=15, cast=int)
+
+# Most quick-match pools a worker keeps; least recently loaded go first
+MATCHMAKING_MAX_POOLS = config('MATCHMAKING_MAX_POOLS', default=256, cast=int)
+
+# Fraction of requests recorded by core.middleware.MetricsMiddleware
+# (exposed at /api/internal/metrics/); 1.0 records every request
+METRICS_SAMPLE_RATE = config('METRICS_SAMPLE_RATE', default=0.1, cast=float)
+
+# core.middleware.CompressionMiddleware: JSON bodies this size or larger
+# are sent brotli (when installed) or gzip encoded; up to
+# COMPRESS_CACHE_ENTRIES encoded bodies of repeat responses are kept
+COMPRESS_MIN_BYTES = config('COMPRESS_MIN_BYTES', default=1024, cast=int)
+COMPRESS_CACHE_ENTRIES = config('COMPRESS_CACHE_ENTRIES', default=256, cast=int)
+
+# Shared secret for /api/internal/ endpoints outside DEBUG (X-Internal-Token)
+INTERNAL_API_TOKEN = config('INTERNAL_API_TOKEN', default='')
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
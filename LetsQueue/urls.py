@@ -16,9 +16,13 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
+from core.views import catalog_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/catalog/', catalog_view, name='catalog'),
+    path('api/catalog/<str:version>/', catalog_view, name='catalog-version'),
     path('api/', include('public_lobby.urls')),    
     path('api/', include('private_lobby.urls')),     
+    path('api/internal/', include('core.urls')),
 ]
\ No newline at end of file
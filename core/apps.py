@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        # Connect lobby_changed receivers and the query recorder
+        from core import events  # noqa: F401
+        from core import metrics  # noqa: F401
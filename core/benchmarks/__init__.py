@@ -0,0 +1,36 @@
+"""
+Benchmark scenarios for ``python manage.py bench``
+
+Each scenario seeds a throwaway test database and returns rows of timing
+stats. Register new ones with ``@scenario`` in a module listed in
+SCENARIO_MODULES.
+"""
+from importlib import import_module
+
+SCENARIO_MODULES = [
+    'core.benchmarks.api',
+    'core.benchmarks.codes',
+    'core.benchmarks.compression',
+    'core.benchmarks.concurrency',
+    'core.benchmarks.connections',
+    'core.benchmarks.expiry',
+    'core.benchmarks.matchmaking',
+    'core.benchmarks.metrics',
+    'core.benchmarks.rendering',
+    'core.benchmarks.serialization',
+]
+
+SCENARIOS = {}
+
+
+def scenario(name):
+    def register(func):
+        SCENARIOS[name] = func
+        return func
+    return register
+
+
+def load_scenarios():
+    for module in SCENARIO_MODULES:
+        import_module(module)
+    return SCENARIOS
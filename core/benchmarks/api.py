@@ -0,0 +1,87 @@
+import itertools
+
+from django.test import Client, override_settings
+
+from core.benchmarks import scenario
+from core.benchmarks import seed
+from core.benchmarks.harness import measure
+
+
+def simulated_client(index):
+    """Request META giving simulated client ``index`` its own fingerprint"""
+    return {
+        'REMOTE_ADDR': f"10.{index >> 16 & 255}.{index >> 8 & 255}.{index & 255}",
+        'HTTP_USER_AGENT': f"bench-client/{index}",
+    }
+
+
+@scenario('api')
+@override_settings(LOBBY_LIST_CACHE_TIMEOUT=0)
+def api(scale=1.0):
+    """
+    Baseline for the main lobby endpoints over realistic volumes
+
+    Seeds public and private lobbies with their participants, then drives
+    list, detail, by-code, create, join and leave through the test
+    client. Public seats are keyed on the client fingerprint (IP + User
+    Agent), so each join comes from its own simulated client and the
+    matching leave from the same one; every request does real work. The
+    list cache is disabled.
+    """
+    client = Client()
+    public = seed.public_lobbies(int(5000 * scale))
+    private = seed.private_lobbies(int(2000 * scale))
+    seed.participants(public + private)
+
+    # Lobbies with room for every join below
+    open_public = [lobby for lobby in public if lobby.max_participants - lobby.participant_count >= 4]
+    iterations = 200
+    tokens = itertools.count()
+    joined = []
+
+    def join():
+        index = next(tokens)
+        lobby = open_public[index % len(open_public)]
+        meta = simulated_client(index)
+        response = client.post(
+            f"/api/public-lobbies/{lobby.pk}/join/", {}, content_type='application/json', **meta
+        )
+        joined.append((lobby, meta))
+        return response
+
+    def leave():
+        lobby, meta = joined.pop()
+        return client.post(
+            f"/api/public-lobbies/{lobby.pk}/leave/", {}, content_type='application/json', **meta
+        )
+
+    codes = itertools.cycle([lobby.lobby_code for lobby in private])
+    details = itertools.cycle([lobby.pk for lobby in open_public])
+
+    endpoints = [
+        ('public list', lambda: client.get('/api/public-lobbies/', {'game': 'valorant'})),
+        ('public list (cursor)', lambda: client.get('/api/public-lobbies/', {'game': 'valorant', 'cursor': ''})),
+        ('public detail', lambda: client.get(f"/api/public-lobbies/{next(details)}/")),
+        ('private by-code', lambda: client.get(f"/api/private-lobbies/by-code/{next(codes)}/")),
+        ('public create', lambda: client.post(
+            '/api/public-lobbies/',
+            {'game': 'valorant', 'rank': 'gold1', 'vibe': 'chill', 'max_participants': 10},
+            content_type='application/json',
+            **simulated_client(next(tokens))
+        )),
+        ('private create', lambda: client.post(
+            '/api/private-lobbies/',
+            {'max_participants': 5},
+            content_type='application/json',
+            HTTP_X_ANON_TOKEN=f"creator-{next(tokens)}"
+        )),
+        ('public join', join),
+        ('public leave', leave),
+    ]
+
+    rows = []
+    for name, func in endpoints:
+        # Leave needs one prior join per call, warmups included
+        warmup = 5 if name != 'public leave' else 0
+        rows.append({'name': name, **measure(func, iterations=iterations, warmup=warmup)})
+    return rows
@@ -0,0 +1,80 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.db import DatabaseError, connection
+from django.test import Client
+
+from core.benchmarks import scenario
+from core.benchmarks.harness import check_response, summarize
+from private_lobby import serializers as private_serializers
+from private_lobby.models import PrivateLobby
+
+
+def create_concurrently(total, workers):
+    """
+    POST ``total`` private lobbies from ``workers`` threads at once
+
+    Returns per-request latencies in ms, the number of requests the
+    database refused and how many generated codes were already taken.
+    Any other failed request raises BenchmarkError.
+    """
+    seen = set(PrivateLobby.objects.values_list('lobby_code', flat=True))
+    collisions = 0
+    lock = threading.Lock()
+    generate = private_serializers.generate_lobby_code
+
+    def counting_generate(*args, **kwargs):
+        nonlocal collisions
+        code = generate(*args, **kwargs)
+        with lock:
+            collisions += code in seen
+            seen.add(code)
+        return code
+
+    def create(index):
+        started = time.perf_counter()
+        try:
+            check_response(Client().post(
+                '/api/private-lobbies/',
+                {'max_participants': 5},
+                content_type='application/json',
+                HTTP_X_ANON_TOKEN=f"bench-{index}"
+            ))
+            ok = True
+        except DatabaseError:
+            ok = False
+        finally:
+            connection.close()
+        return (time.perf_counter() - started) * 1000, ok
+
+    with mock.patch.object(private_serializers, 'generate_lobby_code', counting_generate):
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(create, range(total)))
+
+    failed = sum(not ok for _, ok in results)
+    return [ms for ms, _ in results], failed, collisions
+
+
+@scenario('create-private')
+def create_private(scale=1.0):
+    """
+    Concurrent private lobby creates: latency and code collisions
+
+    Codes are claimed by inserting and retrying on IntegrityError, so a
+    create costs the same however full the table is. Collisions counts
+    generated codes that were already taken; SQLite may also reject
+    competing writers outright, reported as failed.
+    """
+    rows = []
+    total = int(500 * scale)
+    for workers in (1, 8, 32):
+        samples, failed, collisions = create_concurrently(total, workers)
+        rows.append({
+            'name': f"{total} creates, {workers} threads",
+            **summarize(samples),
+            'failed': failed,
+            'collisions': collisions,
+        })
+    return rows
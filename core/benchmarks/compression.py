@@ -0,0 +1,34 @@
+from core.benchmarks import scenario
+from core.benchmarks import seed
+from core.benchmarks.harness import measure
+from core.compression import ENCODERS, EncodedBodyCache
+from core.renderers import render_json
+from public_lobby.models import PublicLobby
+from public_lobby.serializers import PublicLobbyListRows
+
+
+@scenario('compression')
+def compression(scale=1.0):
+    """
+    Compression ratio and CPU cost for list bodies of growing size
+
+    Each available coding is timed compressing the body from scratch,
+    then as a hit in the encoded-body cache, which only hashes it.
+    ``ratio`` is encoded size over raw size.
+    """
+    seed.public_lobbies(int(5000 * scale))
+    rows = PublicLobbyListRows.many(PublicLobbyListRows.values(PublicLobby.objects.all()))
+    bodies = EncodedBodyCache('bench-compression')
+
+    results = []
+    for size in (20, 100, 1000, len(rows)):
+        body = render_json({'count': len(rows), 'next': None, 'previous': None, 'results': rows[:size]})
+        for coding, encode in ENCODERS.items():
+            ratio = round(len(encode(body)) / len(body), 3)
+            stats = measure(lambda: encode(body), iterations=30)
+            results.append({'name': f"{coding} x{size} ({len(body)} B)", 'ratio': ratio, **stats})
+
+            bodies.encode(coding, body)
+            stats = measure(lambda: bodies.encode(coding, body), iterations=30)
+            results.append({'name': f"{coding} x{size} cached", 'ratio': ratio, **stats})
+    return results
@@ -0,0 +1,96 @@
+import asyncio
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection
+from django.test import AsyncClient, Client, override_settings
+
+from core.benchmarks import scenario
+from core.benchmarks import seed
+from core.benchmarks.harness import check_response, summarize
+
+# Request threads per WSGI worker, as with gunicorn --threads
+WSGI_THREADS = 4
+
+REQUESTS_PER_CLIENT = 20
+
+
+def run_wsgi(paths, clients):
+    """``clients`` concurrent clients against a WSGI worker with WSGI_THREADS threads"""
+    worker_threads = threading.Semaphore(WSGI_THREADS)
+
+    def client_loop(start):
+        client = Client()
+        samples = []
+        try:
+            for path in itertools.islice(paths(start), REQUESTS_PER_CLIENT):
+                started = time.perf_counter()
+                # Waiting for a free thread is part of the latency
+                with worker_threads:
+                    check_response(client.get(path))
+                samples.append((time.perf_counter() - started) * 1000)
+        finally:
+            connection.close()
+        return samples
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        results = list(pool.map(client_loop, range(clients)))
+    return [ms for samples in results for ms in samples], time.perf_counter() - started
+
+
+def run_asgi(paths, clients):
+    """``clients`` concurrent clients against one ASGI event loop"""
+
+    async def client_loop(start):
+        client = AsyncClient()
+        samples = []
+        for path in itertools.islice(paths(start), REQUESTS_PER_CLIENT):
+            started = time.perf_counter()
+            check_response(await client.get(path))
+            samples.append((time.perf_counter() - started) * 1000)
+        return samples
+
+    async def main():
+        return await asyncio.gather(*(client_loop(start) for start in range(clients)))
+
+    started = time.perf_counter()
+    results = asyncio.run(main())
+    return [ms for samples in results for ms in samples], time.perf_counter() - started
+
+
+@scenario('wsgi-vs-asgi')
+@override_settings(LOBBY_LIST_CACHE_TIMEOUT=0)
+def wsgi_vs_asgi(scale=1.0):
+    """
+    Read endpoint latency and throughput as concurrent clients grow
+
+    The same list and by-code requests go through Django's sync handler
+    with a fixed pool of WSGI_THREADS, and through the async handler on
+    one event loop, where they hit the async views. Both run in this
+    process, so the comparison is handler against handler on one box.
+    Throughput is requests over wall time across all clients.
+    """
+    seed.public_lobbies(int(5000 * scale))
+    codes = [lobby.lobby_code for lobby in seed.private_lobbies(int(1000 * scale))]
+
+    endpoints = {
+        'list': lambda start: itertools.repeat('/api/public-lobbies/?game=valorant&cursor='),
+        'by-code': lambda start: (
+            f"/api/private-lobbies/by-code/{code}/"
+            for code in itertools.islice(itertools.cycle(codes), start * REQUESTS_PER_CLIENT, None)
+        ),
+    }
+
+    rows = []
+    for endpoint, paths in endpoints.items():
+        for clients in (1, 8, 32):
+            for handler, run in (('wsgi', run_wsgi), ('asgi', run_asgi)):
+                samples, seconds = run(paths, clients)
+                stats = summarize(samples)
+                stats['throughput_rps'] = round(len(samples) / seconds, 1)
+                del stats['queries_per_call']
+                rows.append({'name': f"{endpoint} {handler}, {clients} clients", **stats})
+    return rows
@@ -0,0 +1,58 @@
+import time
+
+from django.db import connection
+from django.test import Client
+
+from core.benchmarks import scenario
+from core.benchmarks import seed
+from core.benchmarks.harness import measure, summarize
+
+
+def connect_cost(iterations):
+    """Time opening a fresh database connection, ms per connect"""
+    samples = []
+    for _ in range(iterations):
+        connection.close()
+        started = time.perf_counter()
+        connection.ensure_connection()
+        samples.append((time.perf_counter() - started) * 1000)
+    return summarize(samples)
+
+
+@scenario('connections')
+def connections(scale=1.0):
+    """
+    Per-request latency with and without connection reuse
+
+    Compares closing the connection after every request
+    (CONN_MAX_AGE=0) against persistent connections, or against the
+    pool when DB_POOL is on. Run against PostgreSQL with DATABASE_URL;
+    SQLite's in-memory test database never really closes, so there the
+    rows come out the same.
+    """
+    client = Client()
+    lobby = seed.public_lobbies(int(1000 * scale))[0]
+    url = f"/api/public-lobbies/{lobby.pk}/"
+
+    settings_dict = connection.settings_dict
+    pooled = bool(settings_dict.get('OPTIONS', {}).get('pool'))
+    original_max_age = settings_dict['CONN_MAX_AGE']
+
+    rows = [{'name': 'connect()', **connect_cost(50)}]
+    if pooled:
+        modes = [('detail, pooled connections', 0)]
+    else:
+        modes = [
+            ('detail, new connection per request', 0),
+            ('detail, persistent connection', None),
+        ]
+
+    try:
+        for name, max_age in modes:
+            connection.close()
+            settings_dict['CONN_MAX_AGE'] = max_age
+            rows.append({'name': name, **measure(lambda: client.get(url), iterations=200)})
+    finally:
+        connection.close()
+        settings_dict['CONN_MAX_AGE'] = original_max_age
+    return rows
@@ -0,0 +1,33 @@
+from django.test import Client, override_settings
+
+from core.benchmarks import scenario
+from core.benchmarks import seed
+from core.benchmarks.harness import measure
+
+
+@scenario('expired-backlog')
+@override_settings(LOBBY_LIST_CACHE_TIMEOUT=0)
+def expired_backlog(scale=1.0):
+    """
+    Public list latency as unswept expired lobbies pile up
+
+    Expired rows stay in status 'active' until the sweeper runs; the list
+    excludes them in SQL. Cursor pages seek through the index and stay
+    flat, page-number mode also pays for a COUNT over the backlog. The
+    list cache is disabled so every call reaches the database.
+    """
+    client = Client()
+    seed.public_lobbies(int(500 * scale))
+
+    rows = []
+    seeded = 0
+    for backlog in (0, int(10_000 * scale), int(50_000 * scale)):
+        seed.public_lobbies(backlog - seeded, expired=True)
+        seeded = backlog
+        for mode, params in (('page', {}), ('cursor', {'cursor': ''})):
+            stats = measure(
+                lambda: client.get('/api/public-lobbies/', {'game': 'valorant', **params}),
+                iterations=50,
+            )
+            rows.append({'name': f"list ({mode}) with {backlog} expired", **stats})
+    return rows
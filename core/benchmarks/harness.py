@@ -0,0 +1,100 @@
+import math
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+from django.test.utils import (
+    CaptureQueriesContext,
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from core.throttling import STORES
+
+# Budget no scenario can run dry; scenarios time requests, not throttling
+UNTHROTTLED_RATE = '1000000/s'
+
+
+class BenchmarkError(Exception):
+    """A scenario request failed, so its timings would mean nothing"""
+
+
+@contextmanager
+def scratch_database():
+    """Run inside a throwaway test database so real data is never touched"""
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+@contextmanager
+def unthrottled():
+    """Lift every throttle budget and start each scenario from empty buckets"""
+    rest_framework = getattr(settings, 'REST_FRAMEWORK', {})
+    rates = dict.fromkeys(rest_framework.get('DEFAULT_THROTTLE_RATES', {}), UNTHROTTLED_RATE)
+    STORES['local'].clear()
+    try:
+        with override_settings(REST_FRAMEWORK={**rest_framework, 'DEFAULT_THROTTLE_RATES': rates}):
+            yield
+    finally:
+        STORES['local'].clear()
+
+
+def check_response(result):
+    """
+    Raise BenchmarkError when ``result`` is a response outside 2xx
+
+    Anything that is not a response passes through, so ``measure`` can
+    time plain functions too.
+    """
+    status = getattr(result, 'status_code', None)
+    if status is not None and not 200 <= status < 300:
+        request = getattr(result, 'request', None) or {}
+        method = request.get('REQUEST_METHOD') or request.get('method')
+        path = request.get('PATH_INFO') or request.get('path')
+        raise BenchmarkError(f"{method} {path} returned {status}")
+    return result
+
+
+def percentile(sorted_samples, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    index = max(0, math.ceil(pct / 100 * len(sorted_samples)) - 1)
+    return sorted_samples[index]
+
+
+def summarize(samples_ms, queries=0):
+    samples_ms = sorted(samples_ms)
+    total_seconds = sum(samples_ms) / 1000
+    return {
+        'iterations': len(samples_ms),
+        'mean_ms': round(sum(samples_ms) / len(samples_ms), 3),
+        'p50_ms': round(percentile(samples_ms, 50), 3),
+        'p95_ms': round(percentile(samples_ms, 95), 3),
+        'p99_ms': round(percentile(samples_ms, 99), 3),
+        'throughput_rps': round(len(samples_ms) / total_seconds, 1) if total_seconds else None,
+        'queries_per_call': round(queries / len(samples_ms), 2),
+    }
+
+
+def measure(func, iterations=100, warmup=5):
+    """Time ``func()`` and count the queries it issues; failed responses raise"""
+    for _ in range(warmup):
+        check_response(func())
+
+    samples = []
+    queries = 0
+    for _ in range(iterations):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            result = func()
+            samples.append((time.perf_counter() - started) * 1000)
+        check_response(result)
+        queries += len(captured.captured_queries)
+
+    return summarize(samples, queries)
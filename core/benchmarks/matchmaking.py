@@ -0,0 +1,31 @@
+from django.test import Client, override_settings
+
+from core.benchmarks import scenario
+from core.benchmarks import seed
+from core.benchmarks.harness import measure
+from public_lobby.matchmaking import matchmaking_index
+
+
+@scenario('quick-match')
+@override_settings(LOBBY_LIST_CACHE_TIMEOUT=0)
+def quick_match(scale=1.0):
+    """
+    Quick match index lookups against the filtered list endpoint
+
+    The index row times only the in-memory candidate search; the
+    endpoint row adds the confirming database lookup and serialization.
+    The list row is what a client scanning for a lobby pays instead.
+    """
+    client = Client()
+    seed.public_lobbies(int(20_000 * scale))
+    matchmaking_index.clear()
+    params = {'game': 'valorant', 'rank': 'gold2', 'vibe': 'chill'}
+
+    rows = []
+    for name, func in (
+        ('index lookup', lambda: matchmaking_index.candidates('valorant', '', 'chill', False, 'gold2')),
+        ('quick-match endpoint', lambda: client.get('/api/public-lobbies/quick-match/', params)),
+        ('list endpoint', lambda: client.get('/api/public-lobbies/', params)),
+    ):
+        rows.append({'name': name, **measure(func, iterations=200)})
+    return rows
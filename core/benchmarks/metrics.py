@@ -0,0 +1,28 @@
+from django.test import Client, override_settings
+
+from core.benchmarks import scenario
+from core.benchmarks import seed
+from core.benchmarks.harness import measure
+from core.metrics import endpoint_metrics
+
+
+@scenario('metrics-overhead')
+@override_settings(LOBBY_LIST_CACHE_TIMEOUT=0)
+def metrics_overhead(scale=1.0):
+    """
+    Cost of MetricsMiddleware at different sample rates
+
+    Runs the same detail request with sampling off, at the default rate
+    and recording everything.
+    """
+    client = Client()
+    lobby = seed.public_lobbies(int(1000 * scale))[0]
+    url = f"/api/public-lobbies/{lobby.pk}/"
+
+    rows = []
+    for rate in (0.0, 0.1, 1.0):
+        endpoint_metrics.clear()
+        with override_settings(METRICS_SAMPLE_RATE=rate):
+            stats = measure(lambda: client.get(url), iterations=500)
+        rows.append({'name': f"detail, sample rate {rate}", **stats})
+    return rows
@@ -0,0 +1,31 @@
+from rest_framework.renderers import JSONRenderer
+
+from core.benchmarks import scenario
+from core.benchmarks import seed
+from core.benchmarks.harness import measure
+from core.renderers import FastJSONRenderer, orjson
+from public_lobby.models import PublicLobby
+from public_lobby.serializers import PublicLobbyListRows
+
+
+@scenario('render-list')
+def render_list(scale=1.0):
+    """
+    Rendering list payloads to bytes: stock JSONRenderer vs FastJSONRenderer
+
+    Rows are serialized once up front so only rendering is timed. Without
+    orjson installed both rows go through the stdlib encoder.
+    """
+    seed.public_lobbies(int(5000 * scale))
+    rows = PublicLobbyListRows.many(PublicLobbyListRows.values(PublicLobby.objects.all()))
+
+    results = []
+    for size in (100, 1000, len(rows)):
+        payload = {'count': len(rows), 'next': None, 'previous': None, 'results': rows[:size]}
+        for name, renderer in (
+            ('json', JSONRenderer()),
+            ('orjson' if orjson else 'orjson (missing, stdlib)', FastJSONRenderer()),
+        ):
+            stats = measure(lambda: renderer.render(payload), iterations=50)
+            results.append({'name': f"{name} x{size}", **stats})
+    return results
@@ -0,0 +1,80 @@
+import random
+from datetime import timedelta
+
+from django.utils import timezone
+
+from core.models import RANK_CHOICES_BY_GAME, VibeChoices, rank_ordinal
+from private_lobby.models import PrivateLobby, PrivateLobbyParticipant
+from private_lobby.serializers import generate_lobby_code
+from public_lobby.models import LobbyParticipant, PublicLobby
+
+BATCH_SIZE = 1000
+
+
+def public_lobbies(count, expired=False, rng=None):
+    """Bulk insert ``count`` public lobbies spread across games and ranks"""
+    rng = rng or random.Random(0)
+    now = timezone.now()
+    games = list(RANK_CHOICES_BY_GAME)
+    vibes = list(VibeChoices.values)
+
+    lobbies = []
+    for i in range(count):
+        game = rng.choice(games)
+        max_participants = rng.choice([5, 10])
+        age = timedelta(minutes=rng.randint(0, 24 * 60))
+        if expired:
+            expires_at = now - age
+        else:
+            expires_at = now + timedelta(hours=24) - age
+        rank = rng.choice(RANK_CHOICES_BY_GAME[game])[0]
+        lobbies.append(PublicLobby(
+            game=game,
+            rank=rank,
+            # bulk_create skips save(), which normally fills this in
+            rank_ordinal=rank_ordinal(game, rank),
+            vibe=rng.choice(vibes),
+            mic_required=rng.random() < 0.5,
+            max_participants=max_participants,
+            participant_count=rng.randint(0, max_participants - 1),
+            created_at=expires_at - timedelta(hours=24),
+            expires_at=expires_at,
+        ))
+    return PublicLobby.objects.bulk_create(lobbies, batch_size=BATCH_SIZE)
+
+
+def private_lobbies(count, creator_token='creator', rng=None):
+    """Bulk insert ``count`` live private lobbies owned by ``creator_token``"""
+    rng = rng or random.Random(0)
+    now = timezone.now()
+
+    codes = set()
+    while len(codes) < count:
+        codes.add(generate_lobby_code())
+
+    lobbies = []
+    for code in codes:
+        max_participants = rng.randint(2, 5)
+        lobbies.append(PrivateLobby(
+            creator_token=creator_token,
+            lobby_code=code,
+            max_participants=max_participants,
+            participant_count=rng.randint(1, max_participants),
+            expires_at=now + timedelta(hours=24),
+        ))
+    return PrivateLobby.objects.bulk_create(lobbies, batch_size=BATCH_SIZE)
+
+
+def participants(lobbies):
+    """Bulk insert participant rows matching each lobby's participant_count"""
+    rows = []
+    for lobby in lobbies:
+        model = LobbyParticipant if isinstance(lobby, PublicLobby) else PrivateLobbyParticipant
+        for i in range(lobby.participant_count):
+            # Private lobbies always hold their creator
+            token = lobby.creator_token if i == 0 and model is PrivateLobbyParticipant else f"seed-{lobby.pk}-{i}"
+            rows.append(model(lobby=lobby, anon_token=token, nickname=f"player{i}"))
+
+    for model in (LobbyParticipant, PrivateLobbyParticipant):
+        model.objects.bulk_create([row for row in rows if type(row) is model], batch_size=BATCH_SIZE)
+    return len(rows)
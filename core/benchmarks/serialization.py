@@ -0,0 +1,86 @@
+from django.test import RequestFactory
+from rest_framework.request import Request
+
+from core.benchmarks import scenario
+from core.benchmarks import seed
+from core.benchmarks.harness import measure
+from core.middleware import AnonTokenMiddleware
+from core.utils import generate_anon_token, get_client_ip, get_user_agent
+from private_lobby.models import PrivateLobby
+from private_lobby.serializers import (
+    PrivateLobbyDetailSerializer,
+    PrivateLobbyListRows,
+    PrivateLobbyListSerializer,
+)
+from public_lobby.models import PublicLobby
+from public_lobby.serializers import PublicLobbyListRows, PublicLobbyListSerializer
+
+# Lobbies per timed call, so rows read as cost per 1,000 lobbies
+LIST_BATCH = 1000
+
+
+class HashPerObjectSerializer(PrivateLobbyDetailSerializer):
+    """is_creator as it was before AnonTokenMiddleware: one hash per lobby"""
+
+    def get_is_creator(self, obj):
+        request = self.context['request']
+        return obj.creator_token == generate_anon_token(
+            get_client_ip(request),
+            get_user_agent(request)
+        )
+
+
+@scenario('serialize-private')
+def serialize_private(scale=1.0):
+    """
+    Serializing many private lobbies with the per-request anon token
+
+    Lobbies are loaded once up front so only serialization is timed.
+    The hash-per-object row is the old is_creator, which re-derived the
+    token for every lobby.
+    """
+    seed.private_lobbies(int(1000 * scale))
+    lobbies = list(PrivateLobby.objects.prefetch_related('participants'))
+
+    request = Request(RequestFactory().get('/api/private-lobbies/', HTTP_USER_AGENT='bench'))
+    AnonTokenMiddleware(lambda request: None).process_request(request._request)
+    context = {'request': request}
+
+    rows = []
+    for name, serializer_class in (
+        ('list', PrivateLobbyListSerializer),
+        ('detail, token per request', PrivateLobbyDetailSerializer),
+        ('detail, hash per object', HashPerObjectSerializer),
+    ):
+        stats = measure(
+            lambda: serializer_class(lobbies, many=True, context=context).data,
+            iterations=20,
+        )
+        rows.append({'name': f"{name} x{len(lobbies)}", **stats})
+    return rows
+
+
+@scenario('serialize-list')
+def serialize_list(scale=1.0):
+    """
+    List payloads for 1,000 lobbies: ModelSerializer vs .values() rows
+
+    Each call reads and serializes one batch, since skipping model
+    instances is half of what the rows path saves.
+    """
+    seed.public_lobbies(int(LIST_BATCH * scale))
+    seed.private_lobbies(int(LIST_BATCH * scale))
+
+    rows = []
+    for label, queryset, serializer_class, rows_class in (
+        ('public', PublicLobby.objects.order_by('-created_at'), PublicLobbyListSerializer, PublicLobbyListRows),
+        ('private', PrivateLobby.objects.order_by('-created_at'), PrivateLobbyListSerializer, PrivateLobbyListRows),
+    ):
+        batch = queryset[:LIST_BATCH]
+        for name, func in (
+            ('serializer', lambda: serializer_class(batch.all(), many=True).data),
+            ('values rows', lambda: rows_class.many(rows_class.values(batch.all()))),
+        ):
+            stats = measure(func, iterations=20)
+            rows.append({'name': f"{label} {name} x{len(batch)}", **stats})
+    return rows
@@ -0,0 +1,92 @@
+import hashlib
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+
+# Every ListCache by namespace, for the internal stats endpoint
+REGISTRY = {}
+
+
+class ListCache:
+    """
+    Response cache partitioned into scopes with O(1) invalidation
+
+    Entry keys embed their scope's generation number, so invalidating a
+    scope is a single counter bump that orphans its entries until they
+    time out. Works on any Django cache backend. Hit, miss and
+    invalidation counters are kept per process.
+    """
+
+    def __init__(self, namespace, alias='default', timeout_setting=None, default_timeout=30):
+        self.namespace = namespace
+        self.alias = alias
+        self.timeout_setting = timeout_setting
+        self.default_timeout = default_timeout
+        self.counters = Counter()
+        REGISTRY[namespace] = self
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    @property
+    def timeout(self):
+        return getattr(settings, self.timeout_setting or '', self.default_timeout)
+
+    def _generation_key(self, scope):
+        return f"{self.namespace}:gen:{scope}"
+
+    def _generation(self, scope):
+        key = self._generation_key(scope)
+        generation = self.cache.get(key)
+        if generation is None:
+            self.cache.add(key, 1, timeout=None)
+            generation = self.cache.get(key, 1)
+        return generation
+
+    async def _ageneration(self, scope):
+        key = self._generation_key(scope)
+        generation = await self.cache.aget(key)
+        if generation is None:
+            await self.cache.aadd(key, 1, timeout=None)
+            generation = await self.cache.aget(key, 1)
+        return generation
+
+    def _digest(self, parts):
+        return hashlib.md5('|'.join(map(str, parts)).encode()).hexdigest()
+
+    def _entry_key(self, scope, parts):
+        return f"{self.namespace}:{scope}:{self._generation(scope)}:{self._digest(parts)}"
+
+    async def _aentry_key(self, scope, parts):
+        return f"{self.namespace}:{scope}:{await self._ageneration(scope)}:{self._digest(parts)}"
+
+    def get(self, scope, parts):
+        value = self.cache.get(self._entry_key(scope, parts))
+        self.counters['hits' if value is not None else 'misses'] += 1
+        return value
+
+    async def aget(self, scope, parts):
+        value = await self.cache.aget(await self._aentry_key(scope, parts))
+        self.counters['hits' if value is not None else 'misses'] += 1
+        return value
+
+    def set(self, scope, parts, value):
+        self.cache.set(self._entry_key(scope, parts), value, timeout=self.timeout)
+
+    async def aset(self, scope, parts, value):
+        await self.cache.aset(await self._aentry_key(scope, parts), value, timeout=self.timeout)
+
+    def invalidate(self, *scopes):
+        for scope in scopes:
+            key = self._generation_key(scope)
+            try:
+                self.cache.incr(key)
+            except ValueError:
+                # Nothing cached under this scope yet
+                self.cache.add(key, 1, timeout=None)
+            self.counters['invalidations'] += 1
+
+    def stats(self):
+        return {name: self.counters[name] for name in ('hits', 'misses', 'invalidations')}
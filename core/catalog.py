@@ -0,0 +1,45 @@
+import hashlib
+
+from core.models import RANK_CHOICES_BY_GAME, GameChoices, VibeChoices
+from core.renderers import render_json
+
+
+def content_tag(body):
+    return hashlib.sha256(body).hexdigest()[:16]
+
+
+class Catalog:
+    """
+    Games, ranks and vibes, rendered once into immutable JSON bytes
+
+    Built at import from the choices in core.models, which only change
+    with a deploy. ``version`` is a hash of the body and doubles as its
+    ETag; the per-game rank payloads are sliced from the same data and
+    carry their own hashes.
+    """
+
+    def __init__(self):
+        self.games = [
+            {
+                "value": game.value,
+                "label": game.label,
+                "ranks": [
+                    {"value": value, "label": label}
+                    for value, label in RANK_CHOICES_BY_GAME[game.value]
+                ],
+            }
+            for game in GameChoices
+        ]
+        self.vibes = [{"value": vibe.value, "label": vibe.label} for vibe in VibeChoices]
+
+        self.body = render_json({"games": self.games, "vibes": self.vibes})
+        self.version = content_tag(self.body)
+
+        # game -> (body, tag) for the ranks endpoint
+        self.ranks = {}
+        for game in self.games:
+            body = render_json({"game": game["value"], "ranks": game["ranks"]})
+            self.ranks[game["value"]] = (body, content_tag(body))
+
+
+catalog = Catalog()
@@ -0,0 +1,105 @@
+import gzip
+import hashlib
+import threading
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+
+from core.cache import REGISTRY
+
+try:
+    import brotli
+except ImportError:  # optional; gzip only without it
+    brotli = None
+
+# Levels tuned for per-request work rather than best ratio
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def gzip_encode(body):
+    # mtime=0 keeps the output stable for the same body
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def brotli_encode(body):
+    return brotli.compress(body, quality=BROTLI_QUALITY)
+
+
+# Content-Encoding -> encoder, in server preference order
+ENCODERS = OrderedDict()
+if brotli is not None:
+    ENCODERS['br'] = brotli_encode
+ENCODERS['gzip'] = gzip_encode
+
+
+def negotiate(accept_encoding):
+    """
+    Pick the Content-Encoding for an Accept-Encoding header, or None
+
+    Codings with q=0 are refused; among the rest the server's preference
+    (brotli, then gzip) wins over the client's q-values.
+    """
+    accepted = {}
+    for part in accept_encoding.split(','):
+        coding, _, params = part.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+
+    wildcard = accepted.get('*', 0.0)
+    for coding in ENCODERS:
+        if accepted.get(coding, wildcard) > 0:
+            return coding
+    return None
+
+
+class EncodedBodyCache:
+    """
+    Process-local LRU of compressed bodies keyed by (coding, body hash)
+
+    Cacheable responses such as list-cache hits repeat the same bytes,
+    so hashing the body is enough to skip compressing it again. Holds
+    up to COMPRESS_CACHE_ENTRIES bodies. Safe to share between threads.
+    """
+
+    def __init__(self, namespace):
+        self.entries = OrderedDict()
+        self.counters = Counter()
+        self._lock = threading.Lock()
+        REGISTRY[namespace] = self
+
+    def encode(self, coding, body):
+        key = (coding, hashlib.blake2b(body, digest_size=16).digest())
+        with self._lock:
+            encoded = self.entries.get(key)
+            if encoded is not None:
+                self.entries.move_to_end(key)
+                self.counters['hits'] += 1
+                return encoded
+
+        # Compress outside the lock; a concurrent miss just does it twice
+        encoded = ENCODERS[coding](body)
+        with self._lock:
+            self.counters['misses'] += 1
+            self.entries[key] = encoded
+            self.entries.move_to_end(key)
+            while len(self.entries) > settings.COMPRESS_CACHE_ENTRIES:
+                self.entries.popitem(last=False)
+                self.counters['evictions'] += 1
+        return encoded
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+
+    def stats(self):
+        return {name: self.counters[name] for name in ('hits', 'misses', 'evictions')}
+
+
+encoded_bodies = EncodedBodyCache('compressed-bodies')
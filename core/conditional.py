@@ -0,0 +1,24 @@
+from django.utils.cache import quote_etag
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+
+
+def if_none_match(etag_func):
+    """
+    condition() for viewset methods that only pays for the ETag lookup
+    when the client sent If-None-Match
+
+    Unconditional GETs skip the extra query; the view tags its response
+    from the lobby it loads anyway (see with_etag).
+    """
+    def guarded_etag(request, *args, **kwargs):
+        if 'HTTP_IF_NONE_MATCH' not in request.META:
+            return None
+        return etag_func(request, *args, **kwargs)
+
+    return method_decorator(condition(etag_func=guarded_etag))
+
+
+def with_etag(response, etag):
+    response['ETag'] = quote_etag(etag)
+    return response
@@ -0,0 +1,41 @@
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from core.events import lobby_group
+
+
+class LobbyEventsConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Push join, leave, full and expire events for a single lobby
+
+    Subclasses set ``kind``, ``model`` and the ``lookup_field`` the URL key
+    matches; the socket is closed with 4404 when no live lobby has it.
+    """
+    kind = None
+    model = None
+    lookup_field = 'pk'
+
+    async def lobby_exists(self, key):
+        return await self.model.objects.filter(
+            status__in=['active', 'full'],
+            **{self.lookup_field: key}
+        ).aexists()
+
+    def get_key(self):
+        return self.scope['url_route']['kwargs']['key']
+
+    async def connect(self):
+        key = self.get_key()
+        if not await self.lobby_exists(key):
+            await self.close(code=4404)
+            return
+
+        self.group_name = lobby_group(self.kind, key)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, code):
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def lobby_event(self, message):
+        await self.send_json(message['data'])
@@ -0,0 +1,48 @@
+import contextvars
+import random
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+
+class RoutingState:
+    """Per-request routing flags; reads go to the primary once ``pinned``"""
+    __slots__ = ('pinned', 'wrote')
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+# Set by ReplicaPinMiddleware for the duration of a request
+routing_state = contextvars.ContextVar('routing_state', default=None)
+
+
+class ReplicaRouter:
+    """
+    Send reads to a replica from settings.DATABASE_REPLICAS, writes to default
+
+    Only reads made while serving a request that has not written are
+    routed to replicas. The first write of a request pins the rest of it
+    to the primary, and ReplicaPinMiddleware keeps the caller pinned for
+    a few seconds after, so clients read their own writes. Code running
+    outside a request (commands, the sweeper, consumers) always uses the
+    primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = getattr(settings, 'DATABASE_REPLICAS', [])
+        state = routing_state.get()
+        if not replicas or state is None or state.pinned:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = routing_state.get()
+        if state is not None:
+            state.pinned = state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
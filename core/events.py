@@ -0,0 +1,63 @@
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+from django.dispatch import receiver
+
+from core.signals import lobby_changed
+
+CREATE = 'create'
+JOIN = 'join'
+LEAVE = 'leave'
+FULL = 'full'
+EXPIRE = 'expire'
+
+LOBBY_EVENTS = (CREATE, JOIN, LEAVE, FULL, EXPIRE)
+
+
+def lobby_group(kind, key):
+    """Channel layer group for one lobby, e.g. ``private-lobby.ABCDEFGH``"""
+    return f"{kind}-lobby.{key}"
+
+
+def notify_lobby_changed(lobby, event, participant=None):
+    """
+    Announce a lobby change once the current transaction commits
+
+    The payload is built now, so it still describes the lobby after a
+    delete has cleared its primary key.
+    """
+    data = {
+        "event": event,
+        "lobby": {
+            "id": str(lobby.pk),
+            "status": lobby.status,
+            "participant_count": lobby.participant_count,
+            "max_participants": lobby.max_participants,
+            "version": lobby.version,
+        },
+    }
+    if participant is not None:
+        data["participant"] = {
+            "id": str(participant.pk),
+            "nickname": participant.nickname,
+        }
+    group = lobby.event_group
+
+    transaction.on_commit(
+        lambda: lobby_changed.send(
+            sender=type(lobby),
+            lobby=lobby,
+            event=event,
+            data=data,
+            group=group,
+        )
+    )
+
+
+@receiver(lobby_changed)
+def broadcast_to_websockets(sender, event, data, group, **kwargs):
+    """Forward lobby events to WebSocket subscribers through the channel layer"""
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    async_to_sync(channel_layer.group_send)(group, {"type": "lobby.event", "data": data})
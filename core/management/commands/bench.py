@@ -0,0 +1,121 @@
+import json
+import platform
+import subprocess
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from core.benchmarks import load_scenarios
+from core.benchmarks.harness import scratch_database, unthrottled
+
+COLUMNS = ['p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps', 'queries_per_call']
+
+# Scenario-specific counters, shown when a scenario reports them
+EXTRA_COLUMNS = ['failed', 'collisions', 'ratio']
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Run benchmark scenarios against a throwaway test database. "
+        "Uses the configured database, so set DATABASE_URL to benchmark PostgreSQL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'scenarios',
+            nargs='*',
+            help="Scenarios to run (default: all)",
+        )
+        parser.add_argument(
+            '--scale',
+            type=float,
+            default=1.0,
+            help="Multiply seeded data volumes (default: 1.0)",
+        )
+        parser.add_argument(
+            '--list',
+            action='store_true',
+            help="List available scenarios and exit",
+        )
+        parser.add_argument(
+            '--output',
+            help="Write results as JSON to this file",
+        )
+        parser.add_argument(
+            '--compare',
+            help="JSON results from an earlier run; prints p50 and query count changes",
+        )
+
+    def handle(self, *args, **options):
+        scenarios = load_scenarios()
+
+        if options['list']:
+            for name, func in sorted(scenarios.items()):
+                summary = (func.__doc__ or '').strip().splitlines()[0]
+                self.stdout.write(f"{name:24} {summary}")
+            return
+
+        names = options['scenarios'] or sorted(scenarios)
+        unknown = set(names) - set(scenarios)
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)['scenarios']
+
+        results = {}
+        for name in names:
+            with scratch_database(), unthrottled():
+                rows = scenarios[name](scale=options['scale'])
+            results[name] = rows
+            self.report(name, rows)
+            if baseline and name in baseline:
+                self.compare(rows, baseline[name])
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump({
+                    'revision': git_revision(),
+                    'recorded_at': timezone.now().isoformat(),
+                    'database': connection.vendor,
+                    'python': platform.python_version(),
+                    'scale': options['scale'],
+                    'scenarios': results,
+                }, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+    def report(self, name, rows):
+        self.stdout.write(self.style.MIGRATE_HEADING(name))
+        width = max(len(row['name']) for row in rows)
+        columns = COLUMNS + [c for c in EXTRA_COLUMNS if any(c in row for row in rows)]
+        header = ''.join(f"{column:>18}" for column in columns)
+        self.stdout.write(f"  {'':{width}}{header}")
+        for row in rows:
+            values = ''.join(f"{str(row.get(column, '')):>18}" for column in columns)
+            self.stdout.write(f"  {row['name']:{width}}{values}")
+
+    def compare(self, rows, baseline_rows):
+        before = {row['name']: row for row in baseline_rows}
+        for row in rows:
+            old = before.get(row['name'])
+            if old is None or not old.get('p50_ms'):
+                continue
+            change = (row['p50_ms'] - old['p50_ms']) / old['p50_ms'] * 100
+            line = f"  {row['name']}: p50 {old['p50_ms']} -> {row['p50_ms']} ms ({change:+.0f}%)"
+            if row.get('queries_per_call') != old.get('queries_per_call'):
+                line += f", queries {old.get('queries_per_call')} -> {row.get('queries_per_call')}"
+            style = self.style.WARNING if change > 10 else self.style.SUCCESS
+            self.stdout.write(style(line))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from core.services import reconcile_participant_counts
+from private_lobby.models import PrivateLobby
+from public_lobby.models import PublicLobby
+
+
+class Command(BaseCommand):
+    help = "Repair drift between lobby participant_count columns and participant rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help="Report drifted lobbies without changing them",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        for model in (PublicLobby, PrivateLobby):
+            drifted = reconcile_participant_counts(model, dry_run=dry_run)
+            verb = "would repair" if dry_run else "repaired"
+            self.stdout.write(f"{model.__name__}: {verb} {drifted} lobbies")
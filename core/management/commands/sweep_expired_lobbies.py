@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.services import sweep_expired_lobbies
+from private_lobby.models import PrivateLobby
+from public_lobby.models import PublicLobby
+
+
+class Command(BaseCommand):
+    help = "Archive and delete expired public and private lobbies in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help="Lobbies archived per transaction (default: 500)",
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=0,
+            help="Keep running, sweeping every N seconds (default: sweep once and exit)",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        interval = options['interval']
+
+        while True:
+            for model in (PublicLobby, PrivateLobby):
+                self.sweep(model, batch_size)
+            if not interval:
+                return
+            time.sleep(interval)
+
+    def sweep(self, model, batch_size):
+        total = 0
+        elapsed = 0.0
+        for batch, (swept, seconds) in enumerate(sweep_expired_lobbies(model, batch_size), 1):
+            total += swept
+            elapsed += seconds
+            self.stdout.write(
+                f"{model.__name__}: batch {batch} swept {swept} in {seconds * 1000:.1f} ms"
+            )
+
+        rate = total / elapsed if elapsed else 0.0
+        self.stdout.write(
+            f"{model.__name__}: swept {total} lobbies in {elapsed:.2f}s ({rate:.0f} lobbies/s)"
+        )
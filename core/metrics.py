@@ -0,0 +1,141 @@
+import bisect
+import contextvars
+import threading
+import time
+from collections import defaultdict
+
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+# Bucket upper bounds; observations above the last land in +Inf
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+# name -> (help text, buckets), in exposition order
+METRICS = {
+    'letsqueue_request_duration_seconds': ("Wall time of sampled requests", DURATION_BUCKETS),
+    'letsqueue_db_duration_seconds': ("Database time of sampled requests", DURATION_BUCKETS),
+    'letsqueue_db_queries': ("Queries issued by sampled requests", QUERY_BUCKETS),
+    'letsqueue_response_size_bytes': ("Body size of sampled non-streaming responses", SIZE_BUCKETS),
+}
+
+# Sample of the request running in this context, None when not sampled
+current_sample = contextvars.ContextVar('current_sample', default=None)
+
+
+class Sample:
+    __slots__ = ('started', 'db_seconds', 'queries')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_seconds = 0.0
+        self.queries = 0
+
+
+class Histogram:
+    """Fixed-bucket histogram; observe() is a bisect and two additions"""
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.bounds + ('+Inf',), self.counts):
+            total += count
+            yield bound, total
+
+
+# Methods recorded under their own label; anything else is 'other'
+KNOWN_METHODS = frozenset(('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'))
+
+
+def escape_label(value):
+    """Escape a label value for the Prometheus text format"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class EndpointMetrics:
+    """
+    Per-process histograms keyed by (metric, endpoint, method)
+
+    Counts cover sampled requests only; divide by the exported sample
+    rate to estimate totals.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = defaultdict(dict)
+
+    def observe(self, endpoint, method, values):
+        # Arbitrary method tokens would each start a new series
+        if method not in KNOWN_METHODS:
+            method = 'other'
+        with self._lock:
+            for name, value in values.items():
+                series = self._histograms[name]
+                histogram = series.get((endpoint, method))
+                if histogram is None:
+                    histogram = series[(endpoint, method)] = Histogram(METRICS[name][1])
+                histogram.observe(value)
+
+    def clear(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def render(self, sample_rate):
+        """Prometheus text exposition format (0.0.4)"""
+        lines = [
+            "# HELP letsqueue_metrics_sample_rate Fraction of requests recorded",
+            "# TYPE letsqueue_metrics_sample_rate gauge",
+            f"letsqueue_metrics_sample_rate {sample_rate}",
+        ]
+        with self._lock:
+            for name, (help_text, _) in METRICS.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                for (endpoint, method), histogram in sorted(self._histograms[name].items()):
+                    labels = f'endpoint="{escape_label(endpoint)}",method="{escape_label(method)}"'
+                    for bound, total in histogram.cumulative():
+                        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {total}')
+                    lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+                    lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+endpoint_metrics = EndpointMetrics()
+
+
+def record_query(execute, sql, params, many, context):
+    """execute_wrapper that charges query time to the current sample"""
+    sample = current_sample.get()
+    if sample is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        sample.db_seconds += time.perf_counter() - started
+        sample.queries += 1
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    """
+    Keep record_query on every database connection
+
+    Installed once per connection rather than per request, so queries
+    run from sync_to_async threads are still charged to the request
+    through the context variable.
+    """
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
@@ -0,0 +1,214 @@
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+from core.compression import ENCODERS, encoded_bodies, negotiate
+from core.db_router import RoutingState, routing_state
+from core.metrics import Sample, current_sample, endpoint_metrics
+from core.responses import json_response
+from core.utils import client_fingerprint, resolve_anon_token
+
+
+class AnonTokenMiddleware(MiddlewareMixin):
+    """
+    Resolve the caller's identities once per request
+
+    request.anon_token is the X-ANON-TOKEN header, or the fingerprint
+    without one; it identifies private lobby creators and guests.
+    request.client_fingerprint is always the IP + User Agent hash, with
+    the IP verified by the trusted proxies; public lobby seats use it.
+    A malformed header is refused with 400.
+    """
+
+    def process_request(self, request):
+        request.client_fingerprint = client_fingerprint(request)
+        try:
+            request.anon_token = resolve_anon_token(request)
+        except ValueError as exc:
+            return json_response({"error": str(exc)}, status=400)
+
+
+class MetricsMiddleware:
+    """
+    Record wall time, DB time, query count and response size per endpoint
+
+    Endpoints are labelled by resolved URL name (e.g. public-lobby-list)
+    and method. Only a METRICS_SAMPLE_RATE fraction of requests is
+    recorded; the rest pay for one random() call. Runs natively in both
+    sync and async stacks, so it adds no thread hop under ASGI.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+
+        sample = Sample()
+        token = current_sample.set(sample)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_sample.reset(token)
+        self.record(request, response, sample)
+        return response
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        sample = Sample()
+        token = current_sample.set(sample)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_sample.reset(token)
+        self.record(request, response, sample)
+        return response
+
+    def sampled(self):
+        rate = getattr(settings, 'METRICS_SAMPLE_RATE', 0)
+        return rate >= 1 or random.random() < rate
+
+    def record(self, request, response, sample):
+        elapsed = time.perf_counter() - sample.started
+        match = request.resolver_match
+        endpoint = match.url_name if match and match.url_name else 'unresolved'
+
+        values = {
+            'letsqueue_request_duration_seconds': elapsed,
+            'letsqueue_db_duration_seconds': sample.db_seconds,
+            'letsqueue_db_queries': sample.queries,
+        }
+        if not response.streaming:
+            values['letsqueue_response_size_bytes'] = len(response.content)
+        endpoint_metrics.observe(endpoint, request.method, values)
+
+
+class ReplicaPinMiddleware:
+    """
+    Decide per request whether reads may use the read replicas
+
+    Unsafe methods read from the primary throughout. A caller whose
+    request wrote to the database stays pinned to the primary for
+    REPLICA_PIN_SECONDS, long enough to cover replication lag, keyed in
+    the shared cache on both request.anon_token and
+    request.client_fingerprint, since public seats are written under the
+    fingerprint. Does nothing when no replicas are configured. Must come
+    after AnonTokenMiddleware.
+    """
+    sync_capable = True
+    async_capable = True
+    safe_methods = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not getattr(settings, 'DATABASE_REPLICAS', []):
+            return self.get_response(request)
+
+        pinned = request.method not in self.safe_methods or bool(cache.get_many(self.pin_keys(request)))
+        state = RoutingState(pinned)
+        token = routing_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            routing_state.reset(token)
+        if state.wrote:
+            cache.set_many(dict.fromkeys(self.pin_keys(request), 1), timeout=settings.REPLICA_PIN_SECONDS)
+        return response
+
+    async def __acall__(self, request):
+        if not getattr(settings, 'DATABASE_REPLICAS', []):
+            return await self.get_response(request)
+
+        pinned = request.method not in self.safe_methods or bool(await cache.aget_many(self.pin_keys(request)))
+        state = RoutingState(pinned)
+        token = routing_state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            routing_state.reset(token)
+        if state.wrote:
+            await cache.aset_many(dict.fromkeys(self.pin_keys(request), 1), timeout=settings.REPLICA_PIN_SECONDS)
+        return response
+
+    def pin_keys(self, request):
+        identities = {request.anon_token, request.client_fingerprint}
+        return [f"db-pin:{identity}" for identity in identities]
+
+
+class CompressionMiddleware:
+    """
+    Negotiated brotli or gzip for JSON responses of COMPRESS_MIN_BYTES or more
+
+    Responses that repeat their bytes (list-cache responses carrying
+    X-Cache, and anything with an ETag) are compressed through the
+    process-local encoded_bodies cache, so a hot list page is compressed
+    once rather than per request. Strong ETags are weakened on encoded
+    responses, as Django's GZipMiddleware does.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.compress(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.compress(request, await self.get_response(request))
+
+    def compress(self, request, response):
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        if not response.get('Content-Type', '').startswith('application/json'):
+            return response
+        body = response.content
+        if len(body) < settings.COMPRESS_MIN_BYTES:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        coding = negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if coding is None:
+            return response
+
+        if self.cacheable(response):
+            encoded = encoded_bodies.encode(coding, body)
+        else:
+            encoded = ENCODERS[coding](body)
+        if len(encoded) >= len(body):
+            return response
+
+        response.content = encoded
+        response['Content-Length'] = str(len(encoded))
+        response['Content-Encoding'] = coding
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
+
+    def cacheable(self, response):
+        return response.has_header('X-Cache') or response.has_header('ETag')
@@ -71,12 +71,41 @@ RANK_CHOICES_BY_GAME = {
     'lol': LOL_RANKS,
 }
 
+# Position of each rank on its game's ladder, lowest first; unranked is
+# not on the ladder
+RANK_ORDINALS_BY_GAME = {
+    game: {value: ordinal for ordinal, (value, _) in enumerate(ranks) if value != 'unranked'}
+    for game, ranks in RANK_CHOICES_BY_GAME.items()
+}
+
+
+def rank_ordinal(game, rank):
+    """Ladder position of ``rank`` in ``game``, or None when it is off the ladder"""
+    return RANK_ORDINALS_BY_GAME.get(game, {}).get(rank)
+
+
+class LobbyQuerySet(models.QuerySet):
+    def live(self):
+        """Lobbies not yet past expires_at, checked in SQL"""
+        return self.filter(expires_at__gt=timezone.now())
+
 
 class BaseLobbyModel(models.Model):
     """Abstract base for both private and public invites"""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     created_at = models.DateTimeField(default=timezone.now, db_index=True)
     expires_at = models.DateTimeField(db_index=True)
+    version = models.PositiveIntegerField(
+        default=1,
+        help_text="Bumped on every change; used as the detail ETag"
+    )
+
+    objects = LobbyQuerySet.as_manager()
     
     class Meta:
-        abstract = True
\ No newline at end of file
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            self.version += 1
+        super().save(*args, **kwargs)
\ No newline at end of file
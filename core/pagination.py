@@ -0,0 +1,166 @@
+import base64
+import binascii
+import uuid
+from collections import OrderedDict
+
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class LobbyPagination(PageNumberPagination):
+    """
+    Page numbers by default, keyset cursors on demand
+
+    Passing ``cursor`` (empty for the first page) switches to keyset mode:
+    rows are ordered by (created_at, id) and each page seeks past the last
+    row of the previous one, so deep pages cost the same as the first and
+    no COUNT(*) is issued.
+
+    Links are relative to the request path, so a cached page is valid for
+    any host. Setting ``link_query_params`` keeps only those parameters in
+    them, for responses cached under a subset of the query string.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+    link_query_params = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.cursor_query_param in request.query_params
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        return self.cursor_page(list(self.cursor_window(queryset, request, page_size)), page_size)
+
+    async def apaginate_queryset(self, queryset, request):
+        """
+        paginate_queryset for async views, reading rows with the async ORM
+
+        ``request`` may be a plain Django request; it is wrapped so the
+        DRF helpers work unchanged.
+        """
+        if not isinstance(request, Request):
+            request = Request(request)
+        self.request = request
+        self.cursor_mode = self.cursor_query_param in request.query_params
+        page_size = self.get_page_size(request)
+
+        if self.cursor_mode:
+            window = self.cursor_window(queryset, request, page_size)
+            return self.cursor_page([row async for row in window], page_size)
+
+        # Count first, then let Paginator validate the page number without I/O
+        paginator = self.django_paginator_class(_Counted(await queryset.acount()), page_size)
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+
+        start = (self.page.number - 1) * page_size
+        self.page.object_list = [row async for row in queryset[start:start + page_size]]
+        return list(self.page)
+
+    def cursor_window(self, queryset, request, page_size):
+        position = self.decode_cursor(request.query_params[self.cursor_query_param])
+
+        queryset = queryset.order_by('-created_at', '-id')
+        if position:
+            created_at, pk = position
+            queryset = queryset.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+            )
+
+        # Fetch one extra row to learn whether another page exists
+        return queryset[:page_size + 1]
+
+    def cursor_page(self, rows, page_size):
+        self.has_next = len(rows) > page_size
+        self.page_rows = rows[:page_size]
+        return self.page_rows
+
+    def get_link_base(self):
+        params = self.request.query_params
+        if self.link_query_params is not None:
+            params = params.copy()
+            for name in list(params):
+                if name not in self.link_query_params:
+                    del params[name]
+        query = params.urlencode()
+        return f"{self.request.path}?{query}" if query else self.request.path
+
+    def get_next_link(self):
+        if not self.page.has_next():
+            return None
+        return replace_query_param(
+            self.get_link_base(), self.page_query_param, self.page.next_page_number()
+        )
+
+    def get_previous_link(self):
+        if not self.page.has_previous():
+            return None
+        page_number = self.page.previous_page_number()
+        if page_number == 1:
+            return remove_query_param(self.get_link_base(), self.page_query_param)
+        return replace_query_param(self.get_link_base(), self.page_query_param, page_number)
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_cursor_link()),
+            ('results', data),
+        ]))
+
+    def get_next_cursor_link(self):
+        if not self.has_next:
+            return None
+        last = self.page_rows[-1]
+        return replace_query_param(
+            self.get_link_base(), self.cursor_query_param, self.encode_cursor(last)
+        )
+
+    def encode_cursor(self, lobby):
+        # Pages hold model instances or .values() rows
+        if isinstance(lobby, dict):
+            created_at, pk = lobby['created_at'], lobby['id']
+        else:
+            created_at, pk = lobby.created_at, lobby.pk
+        raw = f"{created_at.isoformat()}|{pk}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, encoded):
+        if not encoded:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(encoded.encode()).decode()
+            created_at, pk = raw.split('|')
+            created_at = parse_datetime(created_at)
+            pk = uuid.UUID(pk)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if created_at is None:
+            raise NotFound(self.invalid_cursor_message)
+        return created_at, pk
+
+
+class _Counted:
+    """Stand-in object list carrying a precomputed count, for Paginator"""
+
+    def __init__(self, count):
+        self._count = count
+
+    def count(self):
+        return self._count
+
+    def __getitem__(self, key):
+        return []
@@ -0,0 +1,20 @@
+import hmac
+
+from django.conf import settings
+from rest_framework.permissions import BasePermission
+
+
+class IsInternalRequest(BasePermission):
+    """
+    Allow internal endpoints in DEBUG, or with a matching X-Internal-Token
+
+    The token comes from settings.INTERNAL_API_TOKEN; when it is unset the
+    endpoints are closed outside DEBUG.
+    """
+
+    def has_permission(self, request, view):
+        if settings.DEBUG:
+            return True
+        expected = getattr(settings, 'INTERNAL_API_TOKEN', '')
+        provided = request.headers.get('X-Internal-Token', '')
+        return bool(expected) and hmac.compare_digest(provided, expected)
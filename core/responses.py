@@ -0,0 +1,18 @@
+from django.http import HttpResponse
+
+from core.renderers import render_json
+
+
+def json_response(data, status=200, headers=None):
+    """
+    JSON response for plain (async) Django views
+
+    Rendered by the same renderer as the DRF viewsets so the body
+    matches what they send for the same data.
+    """
+    return HttpResponse(
+        render_json(data),
+        status=status,
+        content_type='application/json',
+        headers=headers,
+    )
@@ -0,0 +1,249 @@
+import time
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.exceptions import NotFound
+from rest_framework.settings import api_settings
+
+from core import events
+
+
+def _refuse(message):
+    return serializers.ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [message]})
+
+
+def _participant_model(lobby_model):
+    return lobby_model._meta.get_field('participants').related_model
+
+
+def _claim_seats(lobby, seats, full_message):
+    """
+    Reserve ``seats`` seats with one conditional UPDATE, or raise
+
+    Must run inside a transaction; the row lock taken here serializes
+    concurrent joins until it commits.
+    """
+    lobby_model = type(lobby)
+    claimed = lobby_model.objects.filter(
+        pk=lobby.pk,
+        status='active',
+        expires_at__gt=timezone.now(),
+        participant_count__lte=F('max_participants') - seats,
+    ).update(
+        participant_count=F('participant_count') + seats,
+        version=F('version') + 1,
+        status=Case(
+            When(participant_count__gte=F('max_participants') - seats, then=Value('full')),
+            default=F('status'),
+        ),
+    )
+
+    if not claimed:
+        current = lobby_model.objects.only('expires_at').filter(pk=lobby.pk).first()
+        if current is None:
+            raise NotFound()
+        if current.is_expired:
+            raise _refuse("Lobby has expired")
+        raise _refuse(full_message)
+
+
+def join_lobby(lobby, anon_token, nickname=''):
+    """
+    Atomically add a participant to a public or private lobby
+
+    A single conditional UPDATE claims a seat: it only matches while the
+    lobby is active, unexpired and below capacity, bumps participant_count
+    and flips the status to full when the last seat goes. Concurrent joins
+    queue on that row lock and re-check the condition against the new
+    count. The participant insert runs in the same transaction, so a
+    duplicate join rolls the claimed seat back.
+    Raises ValidationError when the join is refused.
+    """
+    participant_model = _participant_model(type(lobby))
+
+    with transaction.atomic():
+        _claim_seats(lobby, 1, "Lobby is full")
+
+        try:
+            with transaction.atomic():
+                participant = participant_model.objects.create(
+                    lobby_id=lobby.pk,
+                    anon_token=anon_token,
+                    nickname=nickname
+                )
+        except IntegrityError:
+            raise _refuse("You have already joined this lobby")
+
+        lobby.refresh_from_db(fields=['participant_count', 'status', 'version'])
+        events.notify_lobby_changed(lobby, events.JOIN, participant=participant)
+        if lobby.status == 'full':
+            events.notify_lobby_changed(lobby, events.FULL)
+
+    return participant
+
+
+def join_party(lobby, members):
+    """
+    Atomically add a whole party to a lobby, or nobody
+
+    ``members`` is a list of (anon_token, nickname) pairs. Seats for the
+    entire party are claimed with one conditional UPDATE, the same way
+    join_lobby claims one, and the participants go in with a single
+    bulk INSERT. If any member is already in the lobby the seats are
+    rolled back. Raises ValidationError when the join is refused.
+    """
+    participant_model = _participant_model(type(lobby))
+
+    with transaction.atomic():
+        _claim_seats(lobby, len(members), f"Lobby does not have {len(members)} open seats")
+
+        try:
+            with transaction.atomic():
+                participants = participant_model.objects.bulk_create([
+                    participant_model(lobby_id=lobby.pk, anon_token=anon_token, nickname=nickname)
+                    for anon_token, nickname in members
+                ])
+        except IntegrityError:
+            raise _refuse("A party member has already joined this lobby")
+
+        lobby.refresh_from_db(fields=['participant_count', 'status', 'version'])
+        for participant in participants:
+            events.notify_lobby_changed(lobby, events.JOIN, participant=participant)
+        if lobby.status == 'full':
+            events.notify_lobby_changed(lobby, events.FULL)
+
+    return participants
+
+
+def leave_lobby(lobby, anon_token, party_tokens=()):
+    """
+    Remove a participant and release their seat
+
+    ``party_tokens`` are seats the caller took for a party; those still in
+    the lobby leave along with them, in one DELETE and one UPDATE.
+    ``lobby`` is refreshed in place and a leave event per seat goes out on
+    commit. Returns False when none of the tokens is in the lobby.
+    """
+    lobby_model = type(lobby)
+    participant_model = _participant_model(lobby_model)
+
+    with transaction.atomic():
+        participants = list(participant_model.objects.filter(
+            lobby_id=lobby.pk,
+            anon_token__in=[anon_token, *party_tokens]
+        ))
+        if not participants:
+            return False
+        participant_model.objects.filter(pk__in=[participant.pk for participant in participants]).delete()
+
+        lobby_model.objects.filter(pk=lobby.pk).update(
+            participant_count=F('participant_count') - len(participants),
+            version=F('version') + 1,
+            status=Case(
+                When(status='full', then=Value('active')),
+                default=F('status'),
+            ),
+        )
+
+        lobby.refresh_from_db(fields=['participant_count', 'status', 'version'])
+        for participant in participants:
+            events.notify_lobby_changed(lobby, events.LEAVE, participant=participant)
+
+    return True
+
+
+def archive_expired_batch(lobby_model, batch_size, now=None):
+    """
+    Archive and delete one batch of expired lobbies
+
+    Expired rows are found through the (status, expires_at) index and
+    locked with SKIP LOCKED, so concurrent sweepers and in-flight joins do
+    not block each other. Archive rows go in with one bulk INSERT and the
+    lobbies and their participants are removed with set-based DELETEs.
+    Returns the number of lobbies swept.
+    """
+    now = now or timezone.now()
+
+    with transaction.atomic():
+        lobbies = list(
+            lobby_model.objects
+            .select_for_update(skip_locked=True)
+            .filter(status__in=['active', 'full'], expires_at__lte=now)
+            .order_by('expires_at')[:batch_size]
+        )
+        if not lobbies:
+            return 0
+
+        records = [lobby.archive_record(now) for lobby in lobbies]
+        type(records[0]).objects.bulk_create(records)
+
+        for lobby in lobbies:
+            lobby.status = 'expired'
+            events.notify_lobby_changed(lobby, events.EXPIRE)
+
+        lobby_model.objects.filter(pk__in=[lobby.pk for lobby in lobbies]).delete()
+
+    return len(lobbies)
+
+
+def sweep_expired_lobbies(lobby_model, batch_size=500, now=None):
+    """
+    Archive expired lobbies batch by batch until none are left
+
+    Yields (swept, seconds) for every non-empty batch.
+    """
+    now = now or timezone.now()
+    while True:
+        started = time.perf_counter()
+        swept = archive_expired_batch(lobby_model, batch_size, now=now)
+        if not swept:
+            return
+        yield swept, time.perf_counter() - started
+        if swept < batch_size:
+            return
+
+
+def reconcile_participant_counts(lobby_model, dry_run=False):
+    """
+    Repair participant_count drift against the participant table
+
+    Returns the number of lobbies whose stored count was wrong.
+    """
+    participant_model = _participant_model(lobby_model)
+    actual = Coalesce(
+        Subquery(
+            participant_model.objects
+            .filter(lobby_id=OuterRef('pk'))
+            .order_by()
+            .values('lobby_id')
+            .annotate(total=Count('pk'))
+            .values('total')
+        ),
+        0,
+    )
+
+    drifted = list(
+        lobby_model.objects
+        .annotate(actual_count=actual)
+        .exclude(participant_count=F('actual_count'))
+        .values_list('pk', flat=True)
+    )
+    if dry_run or not drifted:
+        return len(drifted)
+
+    with transaction.atomic():
+        lobbies = lobby_model.objects.filter(pk__in=drifted)
+        lobbies.update(participant_count=actual, version=F('version') + 1)
+        lobbies.filter(
+            status='active',
+            participant_count__gte=F('max_participants')
+        ).update(status='full', version=F('version') + 1)
+        lobbies.filter(
+            status='full',
+            participant_count__lt=F('max_participants')
+        ).update(status='active', version=F('version') + 1)
+
+    return len(drifted)
@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# Sent once the surrounding transaction commits, with ``lobby``, ``event``
+# (one of core.events.LOBBY_EVENTS) and ``data`` (the pushed payload).
+lobby_changed = Signal()
@@ -1,3 +1,491 @@
-from django.test import TestCase
+import gzip
+import threading
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+
+from core.catalog import catalog
+from core.compression import encoded_bodies, negotiate
+from core.db_router import ReplicaRouter
+from core.metrics import endpoint_metrics
+from core.renderers import FastJSONRenderer
+from core.middleware import ReplicaPinMiddleware
+from core.services import join_lobby, leave_lobby
+from core.throttling import STORES, CacheBucketStore, LocalBucketStore, drain
+from core.utils import get_client_ip
+from private_lobby.models import PrivateLobby
+from private_lobby.models import ArchivedPrivateLobbyStats, PrivateLobbyParticipant
+from public_lobby.models import ArchivedLobbyStats, LobbyParticipant, PublicLobby
+
+
+class ConcurrentJoinTests(TransactionTestCase):
+    """Fire simultaneous joins at one lobby and make sure it never overfills"""
+    workers = 20
+
+    def _join_concurrently(self, lobby):
+        barrier = threading.Barrier(self.workers)
+        outcomes = []
+
+        def worker(index):
+            try:
+                barrier.wait()
+                join_lobby(lobby, f"token-{index}", nickname=f"player{index}")
+                outcomes.append('joined')
+            except serializers.ValidationError:
+                outcomes.append('refused')
+            except DatabaseError:
+                # SQLite has no row locks and rejects competing writers outright
+                outcomes.append('conflict')
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return outcomes
+
+    def assertNeverOverfilled(self, lobby, outcomes):
+        lobby.refresh_from_db()
+        joined = outcomes.count('joined')
+        self.assertLessEqual(joined, lobby.max_participants)
+        self.assertEqual(lobby.participants.count(), joined)
+        self.assertEqual(lobby.status, 'full' if joined == lobby.max_participants else 'active')
+        if connection.features.has_select_for_update:
+            self.assertEqual(joined, lobby.max_participants)
+            self.assertNotIn('conflict', outcomes)
+
+    def test_public_lobby_never_exceeds_capacity(self):
+        lobby = PublicLobby.objects.create(
+            game='valorant', rank='gold1', vibe='chill', max_participants=5,
+            expires_at=timezone.now() + timedelta(hours=1),
+        )
+
+        outcomes = self._join_concurrently(lobby)
+
+        self.assertNeverOverfilled(lobby, outcomes)
+
+    def test_private_lobby_never_exceeds_capacity(self):
+        lobby = PrivateLobby.objects.create(
+            creator_token='creator', lobby_code='ABCDEFGH', max_participants=3,
+            expires_at=timezone.now() + timedelta(hours=1),
+        )
+
+        outcomes = self._join_concurrently(lobby)
+
+        self.assertNeverOverfilled(lobby, outcomes)
+
+
+class ParticipantCountTests(TestCase):
+    def setUp(self):
+        self.lobby = PublicLobby.objects.create(
+            game='valorant', rank='gold1', vibe='chill', max_participants=2,
+            expires_at=timezone.now() + timedelta(hours=1),
+        )
+
+    def test_join_and_leave_maintain_the_column(self):
+        join_lobby(self.lobby, 'a')
+        join_lobby(self.lobby, 'b')
+        self.lobby.refresh_from_db()
+        self.assertEqual((self.lobby.participant_count, self.lobby.status), (2, 'full'))
+
+        self.assertTrue(leave_lobby(self.lobby, 'a'))
+        self.assertFalse(leave_lobby(self.lobby, 'a'))
+        self.lobby.refresh_from_db()
+        self.assertEqual((self.lobby.participant_count, self.lobby.status), (1, 'active'))
+
+    def test_duplicate_join_releases_the_seat(self):
+        join_lobby(self.lobby, 'a')
+
+        with self.assertRaises(serializers.ValidationError):
+            join_lobby(self.lobby, 'a')
+
+        self.lobby.refresh_from_db()
+        self.assertEqual(self.lobby.participant_count, 1)
+
+    def test_reconcile_command_repairs_drift(self):
+        LobbyParticipant.objects.create(lobby=self.lobby, anon_token='a')
+        LobbyParticipant.objects.create(lobby=self.lobby, anon_token='b')
+        out = StringIO()
+
+        call_command('reconcile_participant_counts', stdout=out)
+
+        self.lobby.refresh_from_db()
+        self.assertEqual((self.lobby.participant_count, self.lobby.status), (2, 'full'))
+        self.assertIn("PublicLobby: repaired 1 lobbies", out.getvalue())
+
+
+class SweepExpiredLobbiesTests(TestCase):
+    def test_sweep_archives_expired_lobbies_in_batches(self):
+        past = timezone.now() - timedelta(minutes=1)
+        for i in range(5):
+            lobby = PublicLobby.objects.create(
+                game='apex', rank='gold', vibe='chill', expires_at=past, participant_count=1,
+            )
+            LobbyParticipant.objects.create(lobby=lobby, anon_token=f"token-{i}")
+        live = PublicLobby.objects.create(
+            game='apex', rank='gold', vibe='chill', expires_at=timezone.now() + timedelta(hours=1),
+        )
+        private = PrivateLobby.objects.create(
+            creator_token='creator', lobby_code='ABCDEFGH', expires_at=past, participant_count=1,
+        )
+        PrivateLobbyParticipant.objects.create(lobby=private, anon_token='creator')
+        out = StringIO()
+
+        call_command('sweep_expired_lobbies', batch_size=2, stdout=out)
+
+        self.assertEqual(list(PublicLobby.objects.all()), [live])
+        self.assertFalse(LobbyParticipant.objects.exists())
+        self.assertEqual(ArchivedLobbyStats.objects.count(), 5)
+        self.assertEqual(ArchivedLobbyStats.objects.filter(total_participants=1).count(), 5)
+        self.assertFalse(PrivateLobby.objects.exists())
+        self.assertFalse(PrivateLobbyParticipant.objects.exists())
+        self.assertEqual(ArchivedPrivateLobbyStats.objects.count(), 1)
+        self.assertIn("PublicLobby: batch 3 swept 1", out.getvalue())
+        self.assertIn("PublicLobby: swept 5 lobbies", out.getvalue())
+
+
+@override_settings(METRICS_SAMPLE_RATE=1.0, INTERNAL_API_TOKEN='secret')
+class MetricsMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        endpoint_metrics.clear()
+        PublicLobby.objects.create(
+            game='valorant',
+            rank='gold1',
+            vibe='chill',
+            expires_at=timezone.now() + timedelta(hours=1),
+        )
+
+    def scrape(self):
+        response = self.client.get(reverse('internal-metrics'), HTTP_X_INTERNAL_TOKEN='secret')
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        return response.content.decode().splitlines()
+
+    def test_records_queries_time_and_size_per_endpoint(self):
+        self.client.get(reverse('public-lobby-list'))
+        self.client.get(reverse('public-lobby-list'))
+
+        lines = self.scrape()
+
+        labels = 'endpoint="public-lobby-list",method="GET"'
+        # The second request is a cache hit with no queries
+        self.assertIn(f"letsqueue_db_queries_sum{{{labels}}} 2", lines)
+        self.assertIn(f"letsqueue_db_queries_count{{{labels}}} 2", lines)
+        self.assertIn(f'letsqueue_db_queries_bucket{{{labels},le="0"}} 1', lines)
+        self.assertIn(f'letsqueue_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2', lines)
+        self.assertTrue(any(line.startswith(f"letsqueue_response_size_bytes_sum{{{labels}}}") for line in lines))
+
+    def test_unsampled_requests_are_not_recorded(self):
+        with self.settings(METRICS_SAMPLE_RATE=0):
+            self.client.get(reverse('public-lobby-list'))
+
+        self.assertFalse(any('public-lobby-list' in line for line in self.scrape()))
+
+    def test_unknown_methods_are_bucketed_and_labels_escaped(self):
+        for method in ('BREW', 'PURGE'):
+            endpoint_metrics.observe('public-lobby-list', method, {'letsqueue_db_queries': 0})
+        endpoint_metrics.observe('odd"name\\', 'GET', {'letsqueue_db_queries': 0})
+
+        lines = self.scrape()
+
+        self.assertIn('letsqueue_db_queries_count{endpoint="public-lobby-list",method="other"} 2', lines)
+        self.assertFalse(any('BREW' in line for line in lines))
+        self.assertIn('letsqueue_db_queries_count{endpoint="odd\\"name\\\\",method="GET"} 1', lines)
+
+    def test_endpoint_is_internal(self):
+        response = self.client.get(reverse('internal-metrics'))
+
+        self.assertEqual(response.status_code, 403)
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'], REPLICA_PIN_SECONDS=5)
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+
+    def serve(self, method, token='caller', write=False, fingerprint='caller-fp'):
+        """Run a request through the middleware and report where its reads went"""
+        reads = []
+
+        def view(request):
+            reads.append(self.router.db_for_read(PublicLobby))
+            if write:
+                self.router.db_for_write(PublicLobby)
+                reads.append(self.router.db_for_read(PublicLobby))
+            return None
+
+        request = getattr(self.factory, method)('/')
+        request.anon_token = token
+        request.client_fingerprint = fingerprint
+        ReplicaPinMiddleware(view)(request)
+        return reads
+
+    def test_safe_reads_use_replicas_and_writes_pin_the_request(self):
+        self.assertEqual(self.serve('get'), ['replica1'])
+        self.assertEqual(self.serve('post'), ['default'])
+        self.assertEqual(self.serve('get', write=True), ['replica1', 'default'])
+
+    def test_writer_reads_its_writes_until_the_pin_expires(self):
+        self.serve('post', write=True)
+
+        self.assertEqual(self.serve('get'), ['default'])
+        self.assertEqual(self.serve('get', token='someone-else', fingerprint='other-fp'), ['replica1'])
+
+        cache.delete_many(['db-pin:caller', 'db-pin:caller-fp'])
+        self.assertEqual(self.serve('get'), ['replica1'])
+
+    def test_fingerprint_writes_pin_header_reads_from_the_same_client(self):
+        # Public seats are written under the fingerprint, whatever the header says
+        self.serve('post', token='caller-fp', write=True)
+
+        self.assertEqual(self.serve('get', token='caller'), ['default'])
+
+    def test_reads_outside_requests_use_the_primary(self):
+        self.assertEqual(self.router.db_for_read(PublicLobby), 'default')
+
+
+class CatalogTests(SimpleTestCase):
+    def test_catalog_is_prerendered_with_content_etag(self):
+        response = self.client.get(reverse('catalog'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, catalog.body)
+        self.assertEqual(response['ETag'], f'"{catalog.version}"')
+        self.assertEqual(response['X-Catalog-Version'], catalog.version)
+        self.assertIn('must-revalidate', response['Cache-Control'])
+        games = {game['value'] for game in response.json()['games']}
+        self.assertIn('valorant', games)
+
+    def test_matching_etag_is_not_modified(self):
+        response = self.client.get(reverse('catalog'), HTTP_IF_NONE_MATCH=f'"{catalog.version}"')
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_versioned_url_is_immutable(self):
+        response = self.client.get(reverse('catalog-version', args=[catalog.version]))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('immutable', response['Cache-Control'])
+
+        stale = self.client.get(reverse('catalog-version', args=['0' * 16]))
+        self.assertEqual(stale.status_code, 404)
+
+    def test_ranks_are_sliced_from_the_catalog(self):
+        body, tag = catalog.ranks['apex']
+
+        response = self.client.get(reverse('public-lobby-ranks'), {'game': 'apex'})
+        self.assertEqual(response.content, body)
+        self.assertEqual(response['ETag'], f'"{tag}"')
+
+        cached = self.client.get(reverse('public-lobby-ranks'), {'game': 'apex'}, HTTP_IF_NONE_MATCH=f'"{tag}"')
+        self.assertEqual(cached.status_code, 304)
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    def test_matches_stock_renderer(self):
+        data = {
+            'results': [{'id': 'a1', 'display_title': 'Valorant • Gold1 • Chill', 'is_full': False}],
+            'count': 1,
+            'next': None,
+            'note': 'line\u2028break',
+        }
+        
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_falls_back_for_values_orjson_rejects(self):
+        data = {'big': 2 ** 70}
+        
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_invalid_json_body_is_a_bad_request(self):
+        lobby_url = reverse('public-lobby-list')
+        
+        response = self.client.post(lobby_url, '{"game":', content_type='application/json')
+        
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('JSON parse error', response.json()['detail'])
+
+
+@override_settings(COMPRESS_MIN_BYTES=512)
+class CompressionMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        encoded_bodies.clear()
+        for _ in range(5):
+            PublicLobby.objects.create(
+                game='valorant',
+                rank='gold1',
+                vibe='chill',
+                expires_at=timezone.now() + timedelta(hours=1),
+            )
+
+    def test_large_json_is_gzipped_when_accepted(self):
+        plain = self.client.get(reverse('public-lobby-list'))
+        encoded = self.client.get(reverse('public-lobby-list'), HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertEqual(encoded['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', encoded['Vary'])
+        self.assertEqual(gzip.decompress(encoded.content), plain.content)
+
+    def test_repeat_list_responses_reuse_the_encoded_body(self):
+        misses = encoded_bodies.counters['misses']
+        hits = encoded_bodies.counters['hits']
+
+        for _ in range(3):
+            self.client.get(reverse('public-lobby-list'), HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(encoded_bodies.counters['misses'] - misses, 1)
+        self.assertEqual(encoded_bodies.counters['hits'] - hits, 2)
+
+    def test_small_responses_are_sent_as_is(self):
+        with self.settings(COMPRESS_MIN_BYTES=1_000_000):
+            response = self.client.get(reverse('public-lobby-list'), HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertNotIn('Content-Encoding', response)
+
+    def test_negotiation(self):
+        self.assertEqual(negotiate('gzip, deflate'), 'gzip')
+        self.assertIsNone(negotiate('gzip;q=0, identity'))
+        self.assertIsNone(negotiate(''))
+
+
+THROTTLED = {**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {'lobby-create': '2/min', 'lobby-join': '2/min'}}
+
+
+@override_settings(REST_FRAMEWORK=THROTTLED, THROTTLE_STORE='local')
+class ThrottleTests(TestCase):
+    def setUp(self):
+        STORES['local'].clear()
+
+    def create(self, token):
+        return self.client.post(
+            reverse('private-lobby-list'),
+            {'max_participants': 2},
+            content_type='application/json',
+            HTTP_X_ANON_TOKEN=token
+        )
+
+    def test_create_is_refused_before_any_query_once_budget_is_spent(self):
+        self.assertEqual(self.create('flooder').status_code, 201)
+        self.assertEqual(self.create('flooder').status_code, 201)
+
+        with self.assertNumQueries(0):
+            response = self.create('flooder')
+
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        # Same address and browser under another token shares the fingerprint budget
+        self.assertEqual(self.create('someone-else').status_code, 429)
+
+    def test_rotating_the_header_does_not_refill_the_budget(self):
+        statuses = [self.create(f"rotated-{i}").status_code for i in range(6)]
+
+        self.assertEqual(statuses, [201, 201, 429, 429, 429, 429])
+        # Refused callers never got a bucket of their own
+        self.assertEqual(len(STORES['local'].buckets), 3)
+
+    def test_token_bucket_follows_the_token_across_addresses(self):
+        self.assertEqual(self.create('shared').status_code, 201)
+        self.assertEqual(self.create('shared').status_code, 201)
+
+        response = self.client.post(
+            reverse('private-lobby-list'),
+            {'max_participants': 2},
+            content_type='application/json',
+            HTTP_X_ANON_TOKEN='shared',
+            REMOTE_ADDR='10.0.0.2'
+        )
+
+        self.assertEqual(response.status_code, 429)
+
+    def test_rotating_user_agent_or_forwarded_for_does_not_refill_the_budget(self):
+        statuses = [
+            self.client.post(
+                reverse('private-lobby-list'),
+                {'max_participants': 2},
+                content_type='application/json',
+                HTTP_USER_AGENT=f"agent-{i}",
+                HTTP_X_FORWARDED_FOR=f"203.0.113.{i}"
+            ).status_code
+            for i in range(4)
+        ]
+
+        self.assertEqual(statuses, [201, 201, 429, 429])
+
+    def test_budgets_are_per_action(self):
+        self.create('flooder')
+        self.create('flooder')
+
+        lobby = PublicLobby.objects.create(
+            game='valorant', rank='gold1', vibe='chill',
+            expires_at=timezone.now() + timedelta(hours=1),
+        )
+        response = self.client.post(
+            reverse('public-lobby-join', args=[lobby.pk]),
+            content_type='application/json',
+            HTTP_X_ANON_TOKEN='flooder'
+        )
+
+        self.assertEqual(response.status_code, 201)
+
+    def test_reads_are_not_throttled(self):
+        for _ in range(5):
+            response = self.client.get(reverse('public-lobby-list'), HTTP_X_ANON_TOKEN='flooder')
+            self.assertEqual(response.status_code, 200)
+
+
+class ClientIpTests(SimpleTestCase):
+    def ip(self, forwarded_for=None):
+        extra = {'HTTP_X_FORWARDED_FOR': forwarded_for} if forwarded_for is not None else {}
+        return get_client_ip(RequestFactory().get('/', REMOTE_ADDR='10.0.0.1', **extra))
+
+    def test_forwarded_for_is_ignored_without_trusted_proxies(self):
+        self.assertEqual(self.ip('203.0.113.7'), '10.0.0.1')
+
+    @override_settings(TRUSTED_PROXY_COUNT=1)
+    def test_client_is_read_from_the_trusted_hop(self):
+        # The proxy appended the last entry; the ones before it are the client's
+        self.assertEqual(self.ip('1.2.3.4, 198.51.100.9'), '198.51.100.9')
+        self.assertEqual(self.ip('198.51.100.9'), '198.51.100.9')
+        self.assertEqual(self.ip(), '10.0.0.1')
+
+    @override_settings(TRUSTED_PROXY_COUNT=2)
+    def test_short_header_falls_back_to_the_peer(self):
+        self.assertEqual(self.ip('198.51.100.9'), '10.0.0.1')
+
+
+class TokenBucketTests(SimpleTestCase):
+    def test_drain_refills_with_time(self):
+        self.assertEqual(drain(0, 0, 30, capacity=2, refill=2 / 60), (True, 0, 0))
+        allowed, tokens, wait = drain(0, 0, 15, capacity=2, refill=2 / 60)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 15)
+
+    def test_local_store_bounds_its_keys(self):
+        store = LocalBucketStore()
+        with self.settings(THROTTLE_LOCAL_MAX_KEYS=2):
+            for key in ('a', 'b', 'c'):
+                store.take(key, 1, 1)
+
+        self.assertEqual(list(store.buckets), ['b', 'c'])
+
+    def test_cache_store_shares_buckets(self):
+        cache.clear()
+        first, second = CacheBucketStore(), CacheBucketStore()
+
+        self.assertTrue(first.take('throttle:test:a', 1, 0.01)[0])
+        self.assertFalse(second.take('throttle:test:a', 1, 0.01)[0])
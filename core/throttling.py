@@ -0,0 +1,140 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from core.utils import get_client_ip
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """'10/min' -> (capacity 10, refill 10/60 tokens per second); DRF's rate format"""
+    num, period = rate.split('/')
+    capacity = int(num)
+    return capacity, capacity / PERIODS[period[0]]
+
+
+def drain(tokens, stamp, now, capacity, refill):
+    """
+    Refill a bucket for the time since ``stamp`` and take one token
+
+    Returns (allowed, tokens left, seconds until the next token).
+    """
+    tokens = min(capacity, tokens + (now - stamp) * refill)
+    if tokens >= 1:
+        return True, tokens - 1, 0
+    return False, tokens, (1 - tokens) / refill
+
+
+class LocalBucketStore:
+    """
+    Buckets held in this process, O(1) per request
+
+    Least recently used buckets are dropped beyond THROTTLE_LOCAL_MAX_KEYS;
+    a dropped bucket comes back full. Each worker counts on its own, so
+    with N workers a caller may get up to N times the budget.
+    """
+    clock = staticmethod(time.monotonic)
+
+    def __init__(self):
+        self.buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, refill):
+        now = self.clock()
+        with self._lock:
+            tokens, stamp = self.buckets.pop(key, (capacity, now))
+            allowed, tokens, wait = drain(tokens, stamp, now, capacity, refill)
+            self.buckets[key] = (tokens, now)
+            if len(self.buckets) > settings.THROTTLE_LOCAL_MAX_KEYS:
+                self.buckets.popitem(last=False)
+        return allowed, wait
+
+    def clear(self):
+        with self._lock:
+            self.buckets.clear()
+
+
+class CacheBucketStore:
+    """
+    Buckets in the shared Django cache, so every worker draws on one budget
+
+    One get and one set per request. The read-modify-write is not atomic,
+    so concurrent requests from one caller can overdraw by a token or two.
+    Entries expire once a bucket would have refilled, which is the same
+    as full.
+    """
+    clock = staticmethod(time.time)
+
+    def __init__(self, alias='default'):
+        self.alias = alias
+
+    def take(self, key, capacity, refill):
+        cache = caches[self.alias]
+        now = self.clock()
+        tokens, stamp = cache.get(key) or (capacity, now)
+        allowed, tokens, wait = drain(tokens, stamp, now, capacity, refill)
+        cache.set(key, (tokens, now), timeout=math.ceil(capacity / refill))
+        return allowed, wait
+
+    def clear(self):
+        pass
+
+
+STORES = {
+    'local': LocalBucketStore(),
+    'cache': CacheBucketStore(),
+}
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Token buckets per caller and budget
+
+    Views map actions to budget names in ``throttle_scopes``; budgets are
+    rates in REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] ('10/min' allows a
+    burst of 10, refilled at 10 per minute). Each request draws on two
+    buckets: one for the client IP as verified by the trusted proxies
+    (core.utils.get_client_ip), and one for request.anon_token. Either
+    running dry refuses the request. The IP bucket is charged first, so
+    a caller rotating the X-ANON-TOKEN or User-Agent headers is stopped
+    before it adds new buckets. Clients behind one NAT share the IP
+    budget.
+    Buckets live in the THROTTLE_STORE store ('local' or 'cache'), never
+    the database, so a throttled request is refused before any query runs.
+    """
+
+    def allow_request(self, request, view):
+        self.retry_after = None
+        scope = getattr(view, 'throttle_scopes', {}).get(getattr(view, 'action', None))
+        if scope is None:
+            return True
+
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope)
+        if rate is None:
+            raise ImproperlyConfigured(f"No throttle rate set for scope '{scope}'")
+        capacity, refill = parse_rate(rate)
+        store = STORES[settings.THROTTLE_STORE]
+
+        for key in self.get_bucket_keys(request, scope):
+            allowed, self.retry_after = store.take(key, capacity, refill)
+            if not allowed:
+                return False
+        return True
+
+    def get_bucket_keys(self, request, scope):
+        keys = [f"throttle:{scope}:ip:{get_client_ip(request)}"]
+        anon_token = getattr(request, 'anon_token', None)
+        if anon_token:
+            keys.append(f"throttle:{scope}:token:{anon_token}")
+        return keys
+
+    def wait(self):
+        return self.retry_after
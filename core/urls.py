@@ -0,0 +1,7 @@
+from django.urls import path
+from core.views import cache_stats, metrics
+
+urlpatterns = [
+    path('cache-stats/', cache_stats, name='internal-cache-stats'),
+    path('metrics/', metrics, name='internal-metrics'),
+]
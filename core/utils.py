@@ -1,4 +1,10 @@
 import hashlib
+import re
+
+from django.conf import settings
+
+# Client-generated tokens (UUIDs, hex); anon_token columns hold 64 chars
+ANON_TOKEN_PATTERN = re.compile(r'[A-Za-z0-9_-]{1,64}')
 
 def generate_anon_token(ip_address: str, user_agent: str, salt: str = "LetsQueue_2025") -> str:
     """
@@ -9,16 +15,59 @@ def generate_anon_token(ip_address: str, user_agent: str, salt: str = "LetsQueue
     return hashlib.sha256(combined.encode()).hexdigest()
 
 
+def party_seat_token(leader_token: str, index: int) -> str:
+    """
+    Seat identity for member ``index`` of a party led by ``leader_token``
+
+    The leader (index 0) keeps their own token; the rest are derived from
+    it, so a repeat join by the same leader collides with its own seats.
+    """
+    if index == 0:
+        return leader_token
+    return hashlib.sha256(f"{leader_token}:party:{index}".encode()).hexdigest()
+
+
 def get_client_ip(request) -> str:
-    """Extract real client IP from request"""
-    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-    if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0]
-    else:
-        ip = request.META.get('REMOTE_ADDR')
-    return ip
+    """
+    Client IP as seen by the outermost trusted proxy
+
+    Each of the TRUSTED_PROXY_COUNT proxies in front of the app appends the
+    address it was reached from to X-Forwarded-For, so the client sits
+    that many entries from the right; entries further left come from the
+    client and are ignored. Without trusted proxies, or when the header
+    is shorter than that, REMOTE_ADDR is used.
+    """
+    proxies = settings.TRUSTED_PROXY_COUNT
+    hops = [hop.strip() for hop in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')]
+    if proxies and len(hops) >= proxies and hops[-proxies]:
+        return hops[-proxies]
+    return request.META.get('REMOTE_ADDR')
 
 
 def get_user_agent(request) -> str:
     """Extract user agent from request"""
     return request.META.get('HTTP_USER_AGENT', '')
+
+
+def client_fingerprint(request) -> str:
+    """
+    Server-derived identity from IP + User Agent
+
+    The IP comes from get_client_ip and cannot be forged past a trusted
+    proxy, but the User Agent is whatever the client sends.
+    """
+    return generate_anon_token(get_client_ip(request), get_user_agent(request))
+
+
+def resolve_anon_token(request) -> str:
+    """
+    Caller identity: the X-ANON-TOKEN header when the client sends one,
+    otherwise the client fingerprint
+    Raises ValueError when the header is not a valid token.
+    """
+    header = request.headers.get("X-ANON-TOKEN")
+    if not header:
+        return client_fingerprint(request)
+    if not ANON_TOKEN_PATTERN.fullmatch(header):
+        raise ValueError("Invalid X-ANON-TOKEN header")
+    return header
@@ -1,3 +1,72 @@
-from django.shortcuts import render
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotAllowed
+from django.utils.cache import get_conditional_response
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
 
-# Create your views here.
+from core.cache import REGISTRY
+from core.catalog import catalog
+from core.conditional import with_etag
+from core.metrics import endpoint_metrics
+from core.permissions import IsInternalRequest
+from core.responses import json_response
+
+# Versioned catalog URLs never change content
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+# The unversioned URL may change on deploy; revalidate with the ETag
+REVALIDATE = 'public, max-age=300, must-revalidate'
+
+
+@api_view(['GET'])
+@permission_classes([IsInternalRequest])
+def cache_stats(request):
+    """
+    Hit, miss and invalidation counters for this worker's response caches
+    Usage: GET /api/internal/cache-stats/
+    """
+    return Response({namespace: cache.stats() for namespace, cache in REGISTRY.items()})
+
+
+@api_view(['GET'])
+@permission_classes([IsInternalRequest])
+def metrics(request):
+    """
+    Per-endpoint latency, DB time, query count and size histograms for this worker
+    Usage: GET /api/internal/metrics/ (Prometheus text format)
+    """
+    return HttpResponse(
+        endpoint_metrics.render(settings.METRICS_SAMPLE_RATE),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
+def precomputed_response(request, body, tag, cache_control):
+    """Serve prerendered JSON bytes, or 304 when If-None-Match has the tag"""
+    response = get_conditional_response(request, etag=f'"{tag}"')
+    if response is None:
+        response = HttpResponse(body, content_type='application/json')
+    response['Cache-Control'] = cache_control
+    return with_etag(response, tag)
+
+
+async def catalog_view(request, version=None):
+    """
+    Every game with its ranks, plus the vibes, as one prerendered document
+    Usage: GET /api/catalog/ (revalidates) or /api/catalog/<version>/ (immutable)
+
+    The current version is sent in X-Catalog-Version and as the ETag.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET', 'HEAD'])
+    if version is not None and version != catalog.version:
+        return json_response({"detail": "Unknown catalog version"}, status=404)
+
+    response = precomputed_response(
+        request,
+        catalog.body,
+        catalog.version,
+        IMMUTABLE if version else REVALIDATE
+    )
+    response['X-Catalog-Version'] = catalog.version
+    return response
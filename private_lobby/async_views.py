@@ -0,0 +1,45 @@
+from django.http import HttpResponseNotAllowed
+from django.utils.cache import get_conditional_response
+
+from core.conditional import with_etag
+from core.responses import json_response
+from private_lobby.models import PrivateLobby
+from private_lobby.serializers import PrivateLobbyDetailSerializer
+from private_lobby.views import lobby_tag
+
+
+async def lobby_by_code(request, code):
+    """
+    Async version of PrivateLobbyViewSet.by_code
+    Usage: GET /api/private-lobbies/by-code/ABC123XY/
+
+    Same responses, ETags and 304s as the viewset action, read through
+    the async ORM so lookups do not hold a worker thread under ASGI.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+
+    code = code.upper()
+    lobbies = PrivateLobby.objects.live().filter(lobby_code=code, status='active')
+
+    if 'HTTP_IF_NONE_MATCH' in request.META:
+        row = await lobbies.values_list('id', 'version', 'creator_token').afirst()
+        if row is not None:
+            etag = lobby_tag(request, *row)
+            not_modified = get_conditional_response(request, etag=f'"{etag}"')
+            if not_modified is not None:
+                return with_etag(not_modified, etag)
+
+    # Participants are prefetched; the async path cannot load them lazily
+    lobby = await lobbies.prefetch_related('participants').afirst()
+
+    if lobby is None:
+        if await PrivateLobby.objects.filter(lobby_code=code, status='active').aexists():
+            return json_response({"error": "This lobby has expired"}, status=410)
+        return json_response({"detail": "No PrivateLobby matches the given query."}, status=404)
+
+    serializer = PrivateLobbyDetailSerializer(lobby, context={'request': request})
+    return with_etag(
+        json_response(serializer.data),
+        lobby_tag(request, lobby.pk, lobby.version, lobby.creator_token)
+    )
@@ -0,0 +1,11 @@
+from core.consumers import LobbyEventsConsumer
+from private_lobby.models import PrivateLobby
+
+
+class PrivateLobbyConsumer(LobbyEventsConsumer):
+    kind = 'private'
+    model = PrivateLobby
+    lookup_field = 'lobby_code'
+
+    def get_key(self):
+        return super().get_key().upper()
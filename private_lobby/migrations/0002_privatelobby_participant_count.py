@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:21
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_participant_count(apps, schema_editor):
+    Lobby = apps.get_model('private_lobby', 'PrivateLobby')
+    Participant = apps.get_model('private_lobby', 'PrivateLobbyParticipant')
+    counts = (
+        Participant.objects
+        .filter(lobby_id=OuterRef('pk'))
+        .order_by()
+        .values('lobby_id')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    Lobby.objects.update(participant_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('private_lobby', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='privatelobby',
+            name='participant_count',
+            field=models.PositiveIntegerField(default=0, help_text='Denormalized; maintained by core.services join/leave'),
+        ),
+        migrations.RunPython(backfill_participant_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('private_lobby', '0002_privatelobby_participant_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='privatelobby',
+            name='version',
+            field=models.PositiveIntegerField(default=1, help_text='Bumped on every change; used as the detail ETag'),
+        ),
+    ]
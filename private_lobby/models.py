@@ -1,5 +1,6 @@
-from django.db import models
+from django.db import models, transaction
 from core.models import BaseLobbyModel
+from core import events
 from django.core.validators import MinValueValidator, MaxValueValidator
 import uuid
 from django.utils import timezone
@@ -21,6 +22,10 @@ class PrivateLobby(BaseLobbyModel):
         default=5,
         validators=[MinValueValidator(2), MaxValueValidator(5)]
     )
+    participant_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Denormalized; maintained by core.services join/leave"
+    )
     status = models.CharField(
         max_length=10,
         choices=PrivateLobbyStatus.choices,
@@ -47,26 +52,36 @@ class PrivateLobby(BaseLobbyModel):
 
     @property
     def is_full(self):
-        return self.participants.count() >= self.max_participants
+        return self.participant_count >= self.max_participants
 
     @property
     def is_expired(self):
         return timezone.now() >= self.expires_at
 
-    def archive_and_delete(self):
-        """Archive stats and delete lobby"""
-        
-        participant_count = self.participants.count()
-        
-        ArchivedPrivateLobbyStats.objects.create(
+    @property
+    def event_group(self):
+        return events.lobby_group('private', self.lobby_code)
+
+    def archive_record(self, expired_at):
+        """Unsaved analytics row for this lobby"""
+        return ArchivedPrivateLobbyStats(
             lobby_id=self.id,
-            total_participants=participant_count,
+            total_participants=self.participant_count,
             created_at=self.created_at,
-            expired_at=timezone.now(),
+            expired_at=expired_at,
         )
+
+    def archive_and_delete(self):
+        """Archive stats and delete lobby"""
         
-        self.participants.all().delete()
-        self.delete()
+        with transaction.atomic():
+            self.archive_record(timezone.now()).save()
+            
+            self.status = PrivateLobbyStatus.EXPIRED
+            events.notify_lobby_changed(self, events.EXPIRE)
+            
+            self.participants.all().delete()
+            self.delete()
 
 
 class PrivateLobbyParticipant(models.Model):
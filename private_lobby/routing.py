@@ -0,0 +1,6 @@
+from django.urls import re_path
+from private_lobby.consumers import PrivateLobbyConsumer
+
+websocket_urlpatterns = [
+    re_path(r'^ws/private-lobbies/(?P<key>[A-Za-z0-9]{8})/$', PrivateLobbyConsumer.as_asgi()),
+]
@@ -1,17 +1,25 @@
 from rest_framework import serializers
+from django.db import IntegrityError, transaction
+from django.db.models import BooleanField, ExpressionWrapper, F, Q
 from django.utils import timezone
 from datetime import timedelta
-import random
+import secrets
 import string
+from core.rows import ValuesRows
 from private_lobby.models import PrivateLobby, PrivateLobbyParticipant
 
+# Exclude confusing characters: 0, O, I, 1 (32 symbols left)
+LOBBY_CODE_CHARS = ''.join(
+    c for c in string.ascii_uppercase + string.digits if c not in '0OI1'
+)
+
+# 32^8 codes make a collision vanishingly rare; retries cover the rest
+LOBBY_CODE_ATTEMPTS = 5
+
 
 def generate_lobby_code(length=8):  
     """Generate random alphanumeric lobby code"""
-    chars = string.ascii_uppercase + string.digits
-    # Exclude confusing characters: 0, O, I, 1
-    chars = chars.replace('0', '').replace('O', '').replace('I', '').replace('1', '')
-    return ''.join(random.choice(chars) for _ in range(length))
+    return ''.join(secrets.choice(LOBBY_CODE_CHARS) for _ in range(length))
 
 
 class PrivateLobbyParticipantSerializer(serializers.ModelSerializer):  
@@ -23,7 +31,7 @@ class PrivateLobbyParticipantSerializer(serializers.ModelSerializer):
 
 class PrivateLobbyListSerializer(serializers.ModelSerializer): 
     """List view for creator - see their lobbies"""
-    participant_count = serializers.SerializerMethodField()
+    participant_count = serializers.IntegerField(read_only=True)
     is_full = serializers.BooleanField(read_only=True)
     is_expired = serializers.BooleanField(read_only=True)
     
@@ -34,15 +42,42 @@ class PrivateLobbyListSerializer(serializers.ModelSerializer):
             'max_participants', 'is_full', 'is_expired',
             'status', 'created_at', 'expires_at'
         ]
+
+
+class PrivateLobbyListRows(ValuesRows):
+    """PrivateLobbyListSerializer output from .values(); is_full is computed in SQL"""
+    columns = (
+        'id', 'lobby_code', 'participant_count', 'max_participants',
+        'is_full', 'status', 'created_at', 'expires_at'
+    )
     
-    def get_participant_count(self, obj):
-        return obj.participants.count()
+    @classmethod
+    def values(cls, queryset):
+        return super().values(queryset.annotate(is_full=ExpressionWrapper(
+            Q(participant_count__gte=F('max_participants')),
+            output_field=BooleanField()
+        )))
+    
+    @classmethod
+    def row(cls, values, page):
+        expires_at = values['expires_at']
+        return {
+            'id': str(values['id']),
+            'lobby_code': values['lobby_code'],
+            'participant_count': values['participant_count'],
+            'max_participants': values['max_participants'],
+            'is_full': values['is_full'],
+            'is_expired': page.now >= expires_at,
+            'status': values['status'],
+            'created_at': page.datetime(values['created_at']),
+            'expires_at': page.datetime(expires_at),
+        }
 
 
 class PrivateLobbyDetailSerializer(serializers.ModelSerializer):  
     """Detail view - includes participants"""
     participants = PrivateLobbyParticipantSerializer(many=True, read_only=True)  
-    participant_count = serializers.SerializerMethodField()
+    participant_count = serializers.IntegerField(read_only=True)
     is_full = serializers.BooleanField(read_only=True)
     is_expired = serializers.BooleanField(read_only=True)
     is_creator = serializers.SerializerMethodField()
@@ -56,21 +91,14 @@ class PrivateLobbyDetailSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'lobby_code', 'status', 'created_at']  
     
-    def get_participant_count(self, obj):
-        return obj.participants.count()
-    
     def get_is_creator(self, obj):
         """Check if current user is creator"""
         request = self.context.get('request')
         if not request:
             return False
         
-        from core.utils import generate_anon_token, get_client_ip, get_user_agent
-        anon_token = generate_anon_token(
-            get_client_ip(request),
-            get_user_agent(request)
-        )
-        return obj.creator_token == anon_token
+        # Resolved once per request by core.middleware.AnonTokenMiddleware
+        return obj.creator_token == request.anon_token
 
 
 class PrivateLobbyCreateSerializer(serializers.ModelSerializer):  
@@ -88,59 +116,53 @@ class PrivateLobbyCreateSerializer(serializers.ModelSerializer):
         return value
     
     def create(self, validated_data):
-        # Generate unique lobby code
-        while True:
-            lobby_code = generate_lobby_code() 
-            if not PrivateLobby.objects.filter(lobby_code=lobby_code).exists():  
-                break
-        
         # Set creator token from request context
         creator_token = self.context['creator_token']
         
         # Set expiry to 24 hours
-        validated_data['lobby_code'] = lobby_code  
         validated_data['creator_token'] = creator_token
         validated_data['expires_at'] = timezone.now() + timedelta(hours=24)
+        validated_data['participant_count'] = 1
         
-        lobby = super().create(validated_data)  
-        
-        # Auto-join creator as first participant
-        PrivateLobbyParticipant.objects.create(  
-            lobby=lobby,  
-            anon_token=creator_token,
-            nickname=""  # Creator can set nickname later
-        )
+        with transaction.atomic():
+            lobby = self._insert_with_unique_code(validated_data)
+            
+            # Auto-join creator as first participant
+            PrivateLobbyParticipant.objects.create(  
+                lobby=lobby,  
+                anon_token=creator_token,
+                nickname=""  # Creator can set nickname later
+            )
         
         return lobby  
+    
+    def _insert_with_unique_code(self, validated_data):
+        """
+        Insert the lobby under a fresh code, retrying on a code collision
+        
+        The unique index on lobby_code is the only check, so there is no
+        exists() round trip and concurrent creates cannot race past it.
+        Each attempt runs in a savepoint so a collision leaves the outer
+        transaction usable. Only a violation on an already taken code is
+        retried; any other IntegrityError is raised as is.
+        """
+        for attempt in range(LOBBY_CODE_ATTEMPTS):
+            validated_data['lobby_code'] = generate_lobby_code()
+            try:
+                with transaction.atomic():
+                    return super().create(validated_data)
+            except IntegrityError:
+                code_taken = PrivateLobby.objects.filter(
+                    lobby_code=validated_data['lobby_code']
+                ).exists()
+                if not code_taken or attempt == LOBBY_CODE_ATTEMPTS - 1:
+                    raise
 
 
 class JoinPrivateLobbySerializer(serializers.Serializer):  
-    """Join lobby with abuse protection"""
+    """Join payload; capacity and duplicate checks run in core.services.join_lobby"""
     nickname = serializers.CharField(
         max_length=50,
         required=False,
         allow_blank=True
     )
-    
-    def validate(self, data):
-        lobby = self.context['lobby']
-        anon_token = self.context['anon_token']
-        
-        # Check if lobby is full
-        if lobby.is_full:
-            raise serializers.ValidationError("Lobby is full")  
-        
-        # Check if lobby is expired
-        if lobby.is_expired:
-            raise serializers.ValidationError("Lobby has expired") 
-        
-        # Check if user already joined (abuse protection)
-        if PrivateLobbyParticipant.objects.filter(  
-            lobby=lobby, 
-            anon_token=anon_token
-        ).exists():
-            raise serializers.ValidationError(
-                "You have already joined this lobby" 
-            )
-        
-        return data
\ No newline at end of file
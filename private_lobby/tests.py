@@ -1,3 +1,286 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.db import IntegrityError
+from django.test import AsyncClient, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core.throttling import STORES
+from private_lobby.models import PrivateLobby, PrivateLobbyParticipant
+from private_lobby.routing import websocket_urlpatterns
+from private_lobby.serializers import (
+    PrivateLobbyCreateSerializer, PrivateLobbyListRows, PrivateLobbyListSerializer,
+)
+
+
+def make_lobby(**kwargs):
+    defaults = {
+        'creator_token': 'creator',
+        'lobby_code': 'ABCDEFGH',
+        'max_participants': 2,
+        'participant_count': 1,
+        'expires_at': timezone.now() + timedelta(hours=24),
+    }
+    defaults.update(kwargs)
+    lobby = PrivateLobby.objects.create(**defaults)
+    PrivateLobbyParticipant.objects.create(lobby=lobby, anon_token=lobby.creator_token)
+    return lobby
+
+
+class JoinByCodeTests(TestCase):
+    def setUp(self):
+        STORES['local'].clear()
+        self.client = APIClient()
+        self.lobby = make_lobby()
+        self.url = reverse('private-lobby-join-by-code', args=[self.lobby.lobby_code])
+
+    def test_last_slot_flips_status_to_full(self):
+        response = self.client.post(self.url, {'nickname': 'p2'}, HTTP_X_ANON_TOKEN='guest')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['lobby']['participant_count'], 2)
+        self.assertTrue(response.data['lobby']['is_full'])
+        self.lobby.refresh_from_db()
+        self.assertEqual(self.lobby.status, 'full')
+
+    def test_full_lobby_is_refused(self):
+        self.client.post(self.url, {}, HTTP_X_ANON_TOKEN='guest')
+
+        response = self.client.post(self.url, {}, HTTP_X_ANON_TOKEN='late')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['non_field_errors'], ["Lobby is full"])
+        self.assertEqual(self.lobby.participants.count(), 2)
+
+    def test_duplicate_join_is_refused(self):
+        response = self.client.post(self.url, {}, HTTP_X_ANON_TOKEN='creator')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.data['non_field_errors'],
+            ["You have already joined this lobby"]
+        )
+
+
+class ByCodeTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_live_lobby_needs_no_expiry_fallback(self):
+        lobby = make_lobby()
+
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('private-lobby-by-code', args=[lobby.lobby_code.lower()]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['participant_count'], 1)
+
+    def test_expired_lobby_is_gone(self):
+        lobby = make_lobby(expires_at=timezone.now() - timedelta(seconds=1))
+
+        response = self.client.get(reverse('private-lobby-by-code', args=[lobby.lobby_code]))
+
+        self.assertEqual(response.status_code, 410)
+
+    def test_unknown_code_is_not_found(self):
+        response = self.client.get(reverse('private-lobby-by-code', args=['ZZZZZZZZ']))
+
+        self.assertEqual(response.status_code, 404)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        STORES['local'].clear()
+        self.client = APIClient()
+        self.lobby = make_lobby(max_participants=3)
+        self.url = reverse('private-lobby-by-code', args=[self.lobby.lobby_code])
+
+    def test_unchanged_lobby_returns_304_from_one_query(self):
+        etag = self.client.get(self.url)['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_join_changes_the_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        join_url = reverse('private-lobby-join-by-code', args=[self.lobby.lobby_code])
+        self.client.post(join_url, {}, HTTP_X_ANON_TOKEN='guest')
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['participant_count'], 2)
+
+
+class AsyncByCodeTests(TestCase):
+    def setUp(self):
+        self.lobby = make_lobby()
+        self.url = reverse('private-lobby-by-code', args=[self.lobby.lobby_code.lower()])
+
+    async def test_by_code_is_served_async_with_etags(self):
+        client = AsyncClient()
+
+        response = await client.get(self.url, headers={'X-Anon-Token': 'creator'})
+        not_modified = await client.get(
+            self.url,
+            headers={'X-Anon-Token': 'creator', 'If-None-Match': response['ETag']}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['is_creator'])
+        self.assertEqual(len(response.json()['participants']), 1)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified['ETag'], response['ETag'])
+
+    async def test_expired_lobby_is_gone(self):
+        await PrivateLobby.objects.filter(pk=self.lobby.pk).aupdate(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+
+        response = await AsyncClient().get(self.url)
+
+        self.assertEqual(response.status_code, 410)
+
+
+class LobbyCodeTests(TestCase):
+    def setUp(self):
+        STORES['local'].clear()
+        self.client = APIClient()
+        self.taken = make_lobby(lobby_code='TAKENAAA')
+
+    def test_code_collision_is_retried_without_precheck(self):
+        codes = iter(['TAKENAAA', 'FRESHBBB'])
+        with mock.patch('private_lobby.serializers.generate_lobby_code', lambda: next(codes)):
+            response = self.client.post(
+                reverse('private-lobby-list'),
+                {'max_participants': 3},
+                HTTP_X_ANON_TOKEN='host'
+            )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['lobby_code'], 'FRESHBBB')
+        self.assertEqual(PrivateLobby.objects.count(), 2)
+
+    def test_other_integrity_errors_are_not_retried(self):
+        serializer = PrivateLobbyCreateSerializer(
+            data={'max_participants': 3}, context={'creator_token': 'host'}
+        )
+        serializer.is_valid(raise_exception=True)
+        failing = mock.Mock(side_effect=IntegrityError('NOT NULL constraint failed'))
+
+        with mock.patch('rest_framework.serializers.ModelSerializer.create', failing):
+            with self.assertRaises(IntegrityError):
+                serializer.save()
+
+        self.assertEqual(failing.call_count, 1)
+
+    def test_codes_use_the_unambiguous_alphabet(self):
+        response = self.client.post(reverse('private-lobby-list'), {'max_participants': 3})
+
+        code = response.data['lobby_code']
+        self.assertEqual(len(code), 8)
+        self.assertFalse(set(code) & set('0OI1'))
+
+
+class AnonTokenTests(TestCase):
+    def setUp(self):
+        STORES['local'].clear()
+        self.client = APIClient()
+
+    def test_header_identity_is_used_for_creator_checks(self):
+        created = self.client.post(
+            reverse('private-lobby-list'),
+            {'max_participants': 3},
+            HTTP_X_ANON_TOKEN='host'
+        )
+        url = reverse('private-lobby-detail', args=[created.data['lobby']['id']])
+
+        self.assertTrue(created.data['lobby']['is_creator'])
+        self.assertTrue(self.client.get(url, HTTP_X_ANON_TOKEN='host').data['is_creator'])
+        self.assertEqual(self.client.delete(url).status_code, 403)
+        self.assertEqual(self.client.delete(url, HTTP_X_ANON_TOKEN='host').status_code, 204)
+
+    def test_fingerprint_is_used_without_header(self):
+        self.client.post(reverse('private-lobby-list'), {'max_participants': 3})
+
+        response = self.client.get(reverse('private-lobby-list'))
+
+        self.assertEqual(response.data['count'], 1)
+
+    def test_malformed_header_is_refused(self):
+        for token in ('x' * 65, 'has space', 'quote"'):
+            response = self.client.get(reverse('private-lobby-list'), HTTP_X_ANON_TOKEN=token)
+
+            self.assertEqual(response.status_code, 400)
+
+
+class LobbyEventsSocketTests(TestCase):
+    def setUp(self):
+        STORES['local'].clear()
+        self.client = APIClient()
+        self.lobby = make_lobby()
+
+    def connect(self, code):
+        return WebsocketCommunicator(URLRouter(websocket_urlpatterns), f"/ws/private-lobbies/{code}/")
+
+    def join(self, token):
+        with self.captureOnCommitCallbacks(execute=True):
+            url = reverse('private-lobby-join-by-code', args=[self.lobby.lobby_code])
+            return self.client.post(url, {'nickname': 'p2'}, HTTP_X_ANON_TOKEN=token)
+
+    async def test_join_pushes_join_and_full_events(self):
+        socket = self.connect(self.lobby.lobby_code.lower())
+        connected, _ = await socket.connect()
+        self.assertTrue(connected)
+
+        await sync_to_async(self.join)('guest')
+
+        joined = await socket.receive_json_from()
+        self.assertEqual(joined['event'], 'join')
+        self.assertEqual(joined['participant']['nickname'], 'p2')
+        self.assertEqual(joined['lobby']['participant_count'], 2)
+        full = await socket.receive_json_from()
+        self.assertEqual(full['event'], 'full')
+        self.assertEqual(full['lobby']['status'], 'full')
+        await socket.disconnect()
+
+    async def test_unknown_code_is_rejected(self):
+        socket = self.connect('ZZZZZZZZ')
+
+        connected, code = await socket.connect()
+
+        self.assertFalse(connected)
+        self.assertEqual(code, 4404)
+
+
+class ListRowsTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+    
+    def test_rows_render_identically_to_serializer(self):
+        make_lobby()
+        make_lobby(lobby_code='HGFEDCBA', participant_count=2)
+        queryset = PrivateLobby.objects.all()
+        
+        rendered = JSONRenderer().render(PrivateLobbyListSerializer(queryset, many=True).data)
+        
+        self.assertEqual(JSONRenderer().render(PrivateLobbyListRows.many(PrivateLobbyListRows.values(queryset))), rendered)
+    
+    def test_list_returns_only_creators_lobbies(self):
+        make_lobby()
+        make_lobby(lobby_code='HGFEDCBA', creator_token='someone-else')
+        
+        response = self.client.get(reverse('private-lobby-list'), HTTP_X_ANON_TOKEN='creator')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['lobby_code'] for row in response.json()['results']], ['ABCDEFGH'])
@@ -1,10 +1,13 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from private_lobby.views import *
+from private_lobby.async_views import lobby_by_code
 
 router = DefaultRouter()
 router.register(r'private-lobbies', PrivateLobbyViewSet, basename='private-lobby')
 
 urlpatterns = [
+    # Async read path; shadows the router's by-code action
+    path('private-lobbies/by-code/<str:code>/', lobby_by_code, name='private-lobby-by-code'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
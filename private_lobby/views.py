@@ -1,17 +1,51 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.core.exceptions import ValidationError
 from django.shortcuts import get_object_or_404
 from private_lobby.models import PrivateLobby, PrivateLobbyParticipant
 from private_lobby.serializers import (
     PrivateLobbyListSerializer,
+    PrivateLobbyListRows,
     PrivateLobbyDetailSerializer,
     PrivateLobbyCreateSerializer,
     JoinPrivateLobbySerializer  
 )
-from core.utils import generate_anon_token, get_client_ip, get_user_agent
+from core.services import join_lobby, leave_lobby
+from core.conditional import if_none_match, with_etag
+from core.throttling import TokenBucketThrottle
 import requests
 
+
+def _lobby_etag(request, **lookup):
+    """Version lookup for conditional GETs; one indexed query, no serialization"""
+    try:
+        row = (
+            PrivateLobby.objects.live()
+            .filter(status='active', **lookup)
+            .values_list('id', 'version', 'creator_token')
+            .first()
+        )
+    except ValidationError:
+        return None
+    if row is None:
+        return None
+    return lobby_tag(request, *row)
+
+
+def lobby_tag(request, lobby_id, version, creator_token):
+    # is_creator is part of the payload, so it is part of the tag
+    return f"{lobby_id}-{version}-{int(creator_token == request.anon_token)}"
+
+
+def lobby_etag(request, pk=None):
+    return _lobby_etag(request, pk=pk)
+
+
+def by_code_etag(request, code=None):
+    return _lobby_etag(request, lobby_code=code.upper())
+
+
 class PrivateLobbyViewSet(viewsets.ModelViewSet): 
     """
     ViewSet for Private Lobbies
@@ -22,8 +56,15 @@ class PrivateLobbyViewSet(viewsets.ModelViewSet):
     join: Join a lobby (POST /private-lobbies/join/{code}/)
     leave: Leave a lobby (POST /private-lobbies/{id}/leave/)
     by_code: Get lobby by code (GET /private-lobbies/by-code/{code}/)
+    
+    create and join draw on per-caller token buckets (core.throttling)
     """
     queryset = PrivateLobby.objects.filter(status='active')  
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scopes = {
+        'create': 'lobby-create',
+        'join_by_code': 'lobby-join',
+    }
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -34,25 +75,33 @@ class PrivateLobbyViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         """Filter to only show creator's own lobbies in list view"""
-        queryset = super().get_queryset()
+        if self.action == 'leave':
+            # Leaving is what reopens a full lobby
+            return PrivateLobby.objects.filter(status__in=['active', 'full'])
+        
+        # Expiry is filtered in SQL, served by the (status, expires_at) index
+        queryset = super().get_queryset().live()
         
         # For list view, only show user's own lobbies
         if self.action == 'list':
-            anon_token = self.request.headers.get("X-ANON-TOKEN")
-            queryset = queryset.filter(creator_token=anon_token)
+            queryset = queryset.filter(creator_token=self.request.anon_token)
         
         return queryset
     
+    def list(self, request, *args, **kwargs):
+        """Creator's lobbies as plain rows; see PrivateLobbyListRows"""
+        queryset = PrivateLobbyListRows.values(self.filter_queryset(self.get_queryset()))
+        
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return Response(PrivateLobbyListRows.many(queryset))
+        return self.get_paginated_response(PrivateLobbyListRows.many(page))
+    
     def create(self, request, *args, **kwargs):
         """Create a new private lobby"""
-        # Generate creator's anon token
-        creator_token = request.headers.get("X-ANON-TOKEN")
-        if not creator_token:
-            return Response({"error": "Missing token"}, status=400)
-        
         serializer = self.get_serializer(
             data=request.data,
-            context={'creator_token': creator_token})
+            context={'creator_token': request.anon_token})
         serializer.is_valid(raise_exception=True)
         lobby = serializer.save()  
         
@@ -68,20 +117,33 @@ class PrivateLobbyViewSet(viewsets.ModelViewSet):
             status=status.HTTP_201_CREATED
         )
     
+    @if_none_match(lobby_etag)
+    def retrieve(self, request, *args, **kwargs):
+        """Lobby details; 304 Not Modified when If-None-Match is current"""
+        lobby = self.get_object()
+        serializer = self.get_serializer(lobby)
+        return with_etag(
+            Response(serializer.data),
+            lobby_tag(request, lobby.pk, lobby.version, lobby.creator_token)
+        )
+    
     @action(detail=False, methods=['get'], url_path='by-code/(?P<code>[^/.]+)')
+    @if_none_match(by_code_etag)
     def by_code(self, request, code=None):
         """
         Get lobby by code instead of UUID
         Usage: GET /api/private-lobbies/by-code/ABC123XY/
+        Served by async_views.lobby_by_code under ASGI; kept for format suffixes
+        Send If-None-Match with the last ETag to get 304 when unchanged
         """
-        lobby = get_object_or_404( 
-            PrivateLobby,  
-            lobby_code=code.upper(),  
+        # Expiry is checked in SQL; only a miss pays for a second lookup
+        lobby = PrivateLobby.objects.live().filter(
+            lobby_code=code.upper(),
             status='active'
-        )
+        ).first()
         
-        # Check if expired
-        if lobby.is_expired:
+        if lobby is None:
+            get_object_or_404(PrivateLobby, lobby_code=code.upper(), status='active')
             return Response(
                 {"error": "This lobby has expired"}, 
                 status=status.HTTP_410_GONE
@@ -91,7 +153,10 @@ class PrivateLobbyViewSet(viewsets.ModelViewSet):
             lobby, 
             context={'request': request}
         )
-        return Response(serializer.data)
+        return with_etag(
+            Response(serializer.data),
+            lobby_tag(request, lobby.pk, lobby.version, lobby.creator_token)
+        )
     
     @action(detail=False, methods=['post'], url_path='join/(?P<code>[^/.]+)')
     def join_by_code(self, request, code=None):
@@ -100,31 +165,19 @@ class PrivateLobbyViewSet(viewsets.ModelViewSet):
         Usage: POST /api/private-lobbies/join/ABC123XY/
         Body: {"nickname": "PlayerName"} (optional)
         """
+        # join_lobby refuses expired lobbies in its conditional UPDATE
         lobby = get_object_or_404(PrivateLobby, lobby_code=code.upper())
-    
-        anon_token = request.headers.get("X-ANON-TOKEN")
-        if not anon_token:
-            return Response({"error": "Missing token"}, status=400)
         
-        # Validate
-        serializer = JoinPrivateLobbySerializer(  
-            data=request.data,
-            context={'lobby': lobby, 'anon_token': anon_token} 
-        )
+        serializer = JoinPrivateLobbySerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
-        # Create participant
-        participant = PrivateLobbyParticipant.objects.create(  
-            lobby=lobby,  
-            anon_token=anon_token,
+        # Lock, check capacity, insert and flip status in one transaction
+        participant = join_lobby(
+            lobby,
+            request.anon_token,
             nickname=serializer.validated_data.get('nickname', '')
         )
         
-        # Update lobby status if full
-        if lobby.is_full:
-            lobby.status = 'full'
-            lobby.save()
-        
         return Response(
             {
                 "message": "Successfully joined lobby", 
@@ -145,47 +198,29 @@ class PrivateLobbyViewSet(viewsets.ModelViewSet):
         """
         lobby = self.get_object() 
         
-        # Generate anon_token
-        ip = get_client_ip(request)
-        user_agent = get_user_agent(request)
-        anon_token = generate_anon_token(ip, user_agent)
-        
         # Check if user is creator
-        if lobby.creator_token == anon_token:
+        if lobby.creator_token == request.anon_token:
             return Response(
                 {"error": "Creator cannot leave their own lobby. Delete it instead."},  
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        # Find and delete participant
-        try:
-            participant = PrivateLobbyParticipant.objects.get(  
-                lobby=lobby,  
-                anon_token=anon_token
-            )
-            participant.delete()
-            
-            # Update lobby status if no longer full
-            if lobby.status == 'full' and not lobby.is_full:
-                lobby.status = 'active'
-                lobby.save()
-            
-            return Response(
-                {
-                    "message": "Successfully left lobby", 
-                    "lobby": PrivateLobbyDetailSerializer( 
-                        lobby, 
-                        context={'request': request}
-                    ).data
-                },
-                status=status.HTTP_200_OK
-            )
-        
-        except PrivateLobbyParticipant.DoesNotExist: 
+        if not leave_lobby(lobby, request.anon_token):
             return Response(
                 {"error": "You are not in this lobby"},  
                 status=status.HTTP_404_NOT_FOUND
             )
+        
+        return Response(
+            {
+                "message": "Successfully left lobby", 
+                "lobby": PrivateLobbyDetailSerializer( 
+                    lobby, 
+                    context={'request': request}
+                ).data
+            },
+            status=status.HTTP_200_OK
+        )
     
     def destroy(self, request, *args, **kwargs):
         """
@@ -193,13 +228,8 @@ class PrivateLobbyViewSet(viewsets.ModelViewSet):
         """
         lobby = self.get_object() 
         
-        # Generate anon_token
-        ip = get_client_ip(request)
-        user_agent = get_user_agent(request)
-        anon_token = generate_anon_token(ip, user_agent)
-        
         # Check if user is creator
-        if lobby.creator_token != anon_token:
+        if lobby.creator_token != request.anon_token:
             return Response(
                 {"error": "Only the creator can delete this lobby"}, 
                 status=status.HTTP_403_FORBIDDEN
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class PublicLobbyConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'public_lobby'
+
+    def ready(self):
+        # Connect the browse feed receiver
+        from public_lobby import signals  # noqa: F401
@@ -0,0 +1,153 @@
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from channels.layers import get_channel_layer
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS
+from django.http import HttpResponseBadRequest, HttpResponseNotAllowed, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import NotFound, ValidationError
+
+from core.catalog import catalog
+from core.responses import json_response
+from core.views import REVALIDATE, precomputed_response
+from public_lobby.cache import ListPagination, list_cache, list_cache_parts, list_scope
+from public_lobby.filters import browse_filters, matches_filters
+from public_lobby.models import PublicLobby
+from public_lobby.serializers import PublicLobbyListRows
+from public_lobby.signals import BROWSE_FEED_GROUP
+from public_lobby.views import PublicLobbyViewSet, rank_options
+
+# Writes and other methods stay on the sync viewset
+sync_lobby_list = PublicLobbyViewSet.as_view({'get': 'list', 'post': 'create'})
+
+# Lobbies sent in the initial snapshot, newest first
+SNAPSHOT_LIMIT = 100
+
+# Seconds between keepalive comments so proxies keep idle streams open
+KEEPALIVE_SECONDS = 15
+
+
+def sse_message(event, data):
+    payload = json.dumps(data, cls=DjangoJSONEncoder)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+async def browse_stream(request):
+    """
+    Server-Sent Events feed for the public browse page
+    Usage: GET /api/public-lobbies/stream/?game=valorant&rank_min=gold1&rank_max=platinum3
+
+    Sends a ``snapshot`` of matching active lobbies, then ``create``,
+    ``update`` and ``delete`` events for lobbies matching the same filters
+    as the list endpoint. Each subscriber is a coroutine waiting on the
+    channel layer, so idle streams hold no worker thread under ASGI.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+
+    try:
+        filters = browse_filters(request.GET)
+    except ValidationError as exc:
+        return HttpResponseBadRequest(json.dumps(exc.detail), content_type='application/json')
+    channel_layer = get_channel_layer()
+
+    # Subscribe before reading the snapshot so no change falls in between
+    channel = await channel_layer.new_channel()
+    await channel_layer.group_add(BROWSE_FEED_GROUP, channel)
+
+    queryset = PublicLobbyListRows.values(
+        PublicLobby.objects
+        .live()
+        .filter(status='active', **filters)
+        .order_by('-created_at', '-id')
+    )[:SNAPSHOT_LIMIT]
+    snapshot = PublicLobbyListRows.many([row async for row in queryset])
+
+    async def stream():
+        try:
+            yield sse_message('snapshot', snapshot)
+            while True:
+                try:
+                    message = await asyncio.wait_for(
+                        channel_layer.receive(channel),
+                        timeout=KEEPALIVE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if matches_filters(message['lobby'], filters):
+                    yield sse_message(message['event'], message['lobby'])
+        finally:
+            await channel_layer.group_discard(BROWSE_FEED_GROUP, channel)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@csrf_exempt
+async def lobby_list(request):
+    """
+    Async GET for the public lobby list; other methods go to the viewset
+    Usage: GET /api/public-lobbies/?game=valorant&page=2
+
+    Same filters, cache and pagination as PublicLobbyViewSet.list, with
+    rows read through the async ORM so a slow database or client does
+    not hold a worker thread under ASGI.
+    """
+    if request.method != 'GET':
+        return await sync_to_async(sync_lobby_list)(request)
+
+    try:
+        filters = browse_filters(request.GET)
+    except ValidationError as exc:
+        return json_response(exc.detail, status=400)
+    scope = list_scope(filters)
+    cache_parts = list_cache_parts(filters, request.GET)
+
+    cached = await list_cache.aget(scope, cache_parts)
+    if cached is not None:
+        return json_response(cached, headers={'X-Cache': 'HIT'})
+
+    # Primary only, as in PublicLobbyViewSet.list, since the page is cached
+    queryset = PublicLobbyListRows.values(
+        PublicLobby.objects.using(DEFAULT_DB_ALIAS)
+        .filter(status='active')
+        .live()
+        .filter(**filters)
+        .order_by('-created_at', '-id')
+    )
+
+    paginator = ListPagination()
+    try:
+        page = await paginator.apaginate_queryset(queryset, request)
+    except NotFound as exc:
+        return json_response({'detail': exc.detail}, status=404)
+    data = paginator.get_paginated_response(
+        PublicLobbyListRows.many(page)
+    ).data
+
+    await list_cache.aset(scope, cache_parts, data)
+    return json_response(data, headers={'X-Cache': 'MISS'})
+
+
+async def lobby_ranks(request):
+    """
+    Valid ranks for a game, prerendered from the catalog
+    Usage: GET /api/public-lobbies/ranks/?game=valorant
+
+    Served with the payload's content hash as ETag; see core.views.catalog_view.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+
+    game = request.GET.get('game')
+    if game not in catalog.ranks:
+        data, status_code = rank_options(game)
+        return json_response(data, status=status_code)
+
+    body, tag = catalog.ranks[game]
+    return precomputed_response(request, body, tag, REVALIDATE)
@@ -0,0 +1,44 @@
+from core.cache import ListCache
+from core.pagination import LobbyPagination
+
+# Scope of list pages not filtered by game; every change invalidates it
+ALL_GAMES = 'all'
+
+list_cache = ListCache('public-lobbies', timeout_setting='LOBBY_LIST_CACHE_TIMEOUT')
+
+# Query parameters that list_cache_parts reads; anything else is ignored
+LIST_QUERY_PARAMS = (
+    'game', 'rank', 'rank_min', 'rank_max', 'vibe', 'mic_required',
+    'page', 'page_size', 'cursor',
+)
+
+
+class ListPagination(LobbyPagination):
+    """LobbyPagination whose links carry only the parameters a cached page is keyed on"""
+    link_query_params = LIST_QUERY_PARAMS
+
+
+def list_scope(filters):
+    return filters.get('game') or ALL_GAMES
+
+
+def list_cache_parts(filters, params):
+    """Normalized (game, rank, rank window, vibe, mic_required, page) tuple for a list request"""
+    if 'cursor' in params:
+        page = f"cursor:{params['cursor']}"
+    else:
+        page = params.get('page', '1')
+    return (
+        filters.get('game'),
+        filters.get('rank'),
+        filters.get('rank_ordinal__gte'),
+        filters.get('rank_ordinal__lte'),
+        filters.get('vibe'),
+        filters.get('mic_required'),
+        page,
+        params.get('page_size'),
+    )
+
+
+def invalidate_game(game):
+    list_cache.invalidate(game, ALL_GAMES)
@@ -0,0 +1,7 @@
+from core.consumers import LobbyEventsConsumer
+from public_lobby.models import PublicLobby
+
+
+class PublicLobbyConsumer(LobbyEventsConsumer):
+    kind = 'public'
+    model = PublicLobby
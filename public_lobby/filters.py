@@ -0,0 +1,79 @@
+import operator
+
+from rest_framework import serializers
+
+from core.models import GameChoices, rank_ordinal
+
+# Rank window bounds and the rank_ordinal lookup each one becomes
+RANK_RANGE_PARAMS = {
+    'rank_min': 'rank_ordinal__gte',
+    'rank_max': 'rank_ordinal__lte',
+}
+
+RANGE_OPERATORS = {
+    'gte': operator.ge,
+    'lte': operator.le,
+}
+
+
+def browse_filters(params):
+    """
+    Normalize the browse filters shared by the list and stream endpoints
+
+    Returns field lookups usable both as ``queryset.filter(**filters)`` and
+    for matching serialized rows with matches_filters.
+    game must be one of GameChoices, since it picks the list cache scope.
+    rank_min/rank_max become a range on rank_ordinal, served by the
+    (game, rank_ordinal, status) index; they need a game and a ranked
+    value, otherwise ValidationError is raised.
+    """
+    filters = {}
+
+    game = params.get('game')
+    if game and game not in GameChoices.values:
+        raise serializers.ValidationError({'game': f"'{game}' is not a valid game"})
+
+    # Filter by game, rank and vibe
+    for field in ('game', 'rank', 'vibe'):
+        value = params.get(field)
+        if value:
+            filters[field] = value
+
+    # Filter by mic requirement
+    mic_required = params.get('mic_required')
+    if mic_required is not None:
+        filters['mic_required'] = mic_required.lower() == 'true'
+
+    # Filter by rank window, e.g. rank_min=gold1&rank_max=platinum3
+    for param, lookup in RANK_RANGE_PARAMS.items():
+        value = params.get(param)
+        if not value:
+            continue
+        if 'game' not in filters:
+            raise serializers.ValidationError({param: 'rank_min/rank_max require game'})
+        ordinal = rank_ordinal(filters.get('game'), value)
+        if ordinal is None:
+            raise serializers.ValidationError(
+                {param: f"'{value}' is not a ranked value for game '{filters['game']}'"}
+            )
+        filters[lookup] = ordinal
+
+    return filters
+
+
+def row_value(row, field):
+    if field == 'rank_ordinal':
+        return rank_ordinal(row.get('game'), row.get('rank'))
+    return row.get(field)
+
+
+def matches_filters(row, filters):
+    for lookup, value in filters.items():
+        field, _, op = lookup.partition('__')
+        actual = row_value(row, field)
+        if not op:
+            if actual != value:
+                return False
+        elif actual is None or not RANGE_OPERATORS[op](actual, value):
+            return False
+    return True
@@ -0,0 +1,218 @@
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import F, prefetch_related_objects
+from django.utils import timezone
+
+from core.models import rank_ordinal
+from public_lobby.models import PublicLobby
+
+# Widest rank distance quick match will accept, in ladder steps
+MAX_RANK_WINDOW = 3
+
+# Pool key for lobbies whose rank is off the ladder (unranked)
+UNRANKED = None
+
+# Most index candidates quick match confirms against the database per call
+MAX_RECHECKS = 20
+
+
+# Longest region a lobby can store (PublicLobby.region max_length)
+MAX_REGION_LENGTH = PublicLobby._meta.get_field('region').max_length
+
+
+def normalize_region(region):
+    return (region or '').strip().upper()
+
+
+def pool_key(game, region, vibe, mic_required):
+    return (game, normalize_region(region), vibe, bool(mic_required))
+
+
+def rank_bucket(game, rank):
+    ordinal = rank_ordinal(game, rank)
+    return UNRANKED if ordinal is None else ordinal
+
+
+class MatchmakingIndex:
+    """
+    In-process index of open public lobbies for quick match
+
+    Lobbies are grouped into pools keyed on (game, region, vibe,
+    mic_required) and, within a pool, into buckets by rank ordinal, so a
+    lookup touches only the buckets inside the rank window. Pools load
+    lazily from the database and reload after MATCHMAKING_POOL_TTL; in
+    between they follow lobby_changed events from this process. Callers
+    must still confirm a match against the database, since other workers
+    change lobbies this index never hears about.
+
+    Empty results are kept as empty pools, so repeated misses stay off
+    the database too. At most MATCHMAKING_MAX_POOLS pools are kept; the
+    least recently loaded go first. Loads query the database without
+    holding the lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # pool key -> {rank bucket -> {lobby id -> entry}}
+        self._pools = {}
+        # pool key -> monotonic load time
+        self._loaded = {}
+        # lobby id -> (pool key, rank bucket), for O(1) updates and removal
+        self._locations = {}
+
+    @staticmethod
+    def _entry(lobby):
+        # Fullest lobby first so parties fill up, then the oldest
+        open_seats = lobby.max_participants - lobby.participant_count
+        return (open_seats, lobby.created_at, lobby.expires_at)
+
+    @staticmethod
+    def _is_open(lobby):
+        return lobby.status == 'active' and lobby.participant_count < lobby.max_participants
+
+    def _discard(self, lobby_id):
+        location = self._locations.pop(lobby_id, None)
+        if location is not None:
+            key, bucket = location
+            self._pools[key][bucket].pop(lobby_id, None)
+
+    def _place(self, lobby):
+        self._discard(lobby.pk)
+        if not self._is_open(lobby):
+            return
+        key = pool_key(lobby.game, lobby.region, lobby.vibe, lobby.mic_required)
+        bucket = rank_bucket(lobby.game, lobby.rank)
+        self._pools.setdefault(key, {}).setdefault(bucket, {})[lobby.pk] = self._entry(lobby)
+        self._locations[lobby.pk] = (key, bucket)
+
+    def update(self, lobby):
+        """Insert, move or drop ``lobby`` to match its current state"""
+        key = pool_key(lobby.game, lobby.region, lobby.vibe, lobby.mic_required)
+        with self._lock:
+            # Unloaded pools will read the lobby from the database anyway
+            if key in self._pools:
+                self._place(lobby)
+
+    def discard(self, lobby_id):
+        with self._lock:
+            self._discard(lobby_id)
+
+    def clear(self):
+        with self._lock:
+            self._pools.clear()
+            self._loaded.clear()
+            self._locations.clear()
+
+    def _evict(self, key):
+        for buckets in self._pools.pop(key, {}).values():
+            for lobby_id in buckets:
+                self._locations.pop(lobby_id, None)
+        self._loaded.pop(key, None)
+
+    def _is_fresh(self, key):
+        loaded_at = self._loaded.get(key)
+        ttl = getattr(settings, 'MATCHMAKING_POOL_TTL', 15)
+        return loaded_at is not None and time.monotonic() - loaded_at < ttl
+
+    @staticmethod
+    def _load(key):
+        game, region, vibe, mic_required = key
+        return list(
+            PublicLobby.objects.live()
+            .filter(
+                status='active',
+                participant_count__lt=F('max_participants'),
+                game=game,
+                region__iexact=region,
+                vibe=vibe,
+                mic_required=mic_required,
+            )
+            .only(
+                'id', 'game', 'rank', 'vibe', 'mic_required', 'region', 'status',
+                'participant_count', 'max_participants', 'created_at', 'expires_at',
+            )
+        )
+
+    def _install(self, key, lobbies):
+        # Events that landed during the load are dropped with the old pool;
+        # quick_match re-checks candidates against the database anyway
+        self._evict(key)
+        self._pools[key] = {}
+        for lobby in lobbies:
+            self._place(lobby)
+        # Re-inserted last, so the first key is the least recently loaded
+        self._loaded[key] = time.monotonic()
+        while len(self._loaded) > getattr(settings, 'MATCHMAKING_MAX_POOLS', 256):
+            self._evict(next(iter(self._loaded)))
+
+    def _ensure_loaded(self, key):
+        with self._lock:
+            if self._is_fresh(key):
+                return
+        lobbies = self._load(key)
+        with self._lock:
+            self._install(key, lobbies)
+
+    def candidates(self, game, region, vibe, mic_required, rank, max_window=MAX_RANK_WINDOW):
+        """
+        Open lobby ids, best first, widening the rank window step by step
+
+        Each step adds the buckets one rank further away on both sides;
+        within a step lobbies are ordered fullest first, then oldest.
+        Unranked players only match unranked lobbies.
+        """
+        key = pool_key(game, region, vibe, mic_required)
+        target = rank_bucket(game, rank)
+        now = timezone.now()
+
+        self._ensure_loaded(key)
+        with self._lock:
+            buckets = self._pools.get(key, {})
+            if target is UNRANKED:
+                steps = [[UNRANKED]]
+            else:
+                steps = [[target]] + [
+                    [target - distance, target + distance]
+                    for distance in range(1, max_window + 1)
+                ]
+
+            ranked = []
+            for step, bucket_ids in enumerate(steps):
+                for bucket in bucket_ids:
+                    for lobby_id, (open_seats, created_at, expires_at) in buckets.get(bucket, {}).items():
+                        if expires_at > now:
+                            ranked.append(((step, open_seats, created_at), lobby_id))
+
+        ranked.sort(key=lambda item: item[0])
+        return [(lobby_id, rank_key[0]) for rank_key, lobby_id in ranked]
+
+
+matchmaking_index = MatchmakingIndex()
+
+
+def quick_match(game, region, vibe, mic_required, rank, max_window=MAX_RANK_WINDOW):
+    """
+    Best open lobby for the given preferences, confirmed against the database
+
+    Returns (lobby, rank_distance) or (None, None). The best
+    MAX_RECHECKS candidates are confirmed in one query; those that turn
+    out to be full, expired or gone are refreshed in the index.
+    """
+    candidates = matchmaking_index.candidates(game, region, vibe, mic_required, rank, max_window)
+    candidates = candidates[:MAX_RECHECKS]
+    if not candidates:
+        return None, None
+
+    lobbies = PublicLobby.objects.live().in_bulk([lobby_id for lobby_id, _ in candidates])
+    for lobby_id, distance in candidates:
+        lobby = lobbies.get(lobby_id)
+        if lobby is None:
+            matchmaking_index.discard(lobby_id)
+            continue
+        if not lobby.is_full and lobby.status == 'active':
+            prefetch_related_objects([lobby], 'participants')
+            return lobby, distance
+        matchmaking_index.update(lobby)
+    return None, None
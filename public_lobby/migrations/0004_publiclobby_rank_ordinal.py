@@ -0,0 +1,61 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:34
+
+from django.db import migrations, models
+from django.db.models import Case, Value, When
+
+# Frozen copy of core.models.RANK_ORDINALS_BY_GAME as of this migration;
+# later ladder changes must not change what the backfill wrote
+RANK_ORDINALS_BY_GAME = {
+    'valorant': {
+        'iron1': 0, 'iron2': 1, 'iron3': 2, 'bronze1': 3,
+        'bronze2': 4, 'bronze3': 5, 'silver1': 6, 'silver2': 7,
+        'silver3': 8, 'gold1': 9, 'gold2': 10, 'gold3': 11,
+        'platinum1': 12, 'platinum2': 13, 'platinum3': 14, 'diamond1': 15,
+        'diamond2': 16, 'diamond3': 17, 'ascendant1': 18, 'ascendant2': 19,
+        'ascendant3': 20, 'immortal1': 21, 'immortal2': 22, 'immortal3': 23,
+        'radiant': 24,
+    },
+    'csgo': {
+        '0-1k': 0, '1k-5k': 1, '5k-10k': 2, '10k-15k': 3,
+        '15k-20k': 4, '20k+': 5,
+    },
+    'apex': {
+        'rookie': 0, 'bronze': 1, 'silver': 2, 'gold': 3,
+        'platinum': 4, 'diamond': 5, 'master': 6, 'predator': 7,
+    },
+    'lol': {
+        'iron': 0, 'bronze': 1, 'silver': 2, 'gold': 3,
+        'platinum': 4, 'diamond': 5, 'master': 6, 'grandmaster': 7,
+        'challenger': 8,
+    },
+}
+
+
+def backfill_rank_ordinal(apps, schema_editor):
+    Lobby = apps.get_model('public_lobby', 'PublicLobby')
+    for game, ordinals in RANK_ORDINALS_BY_GAME.items():
+        Lobby.objects.filter(game=game, rank__in=ordinals).update(
+            rank_ordinal=Case(
+                *[When(rank=rank, then=Value(ordinal)) for rank, ordinal in ordinals.items()]
+            )
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('public_lobby', '0003_publiclobby_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='publiclobby',
+            name='rank_ordinal',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, help_text="Position of rank on the game's ladder; null when unranked", null=True),
+        ),
+        migrations.AddIndex(
+            model_name='publiclobby',
+            index=models.Index(fields=['game', 'rank_ordinal', 'status'], name='public_lobb_game_b27fc8_idx'),
+        ),
+        migrations.RunPython(backfill_rank_ordinal, migrations.RunPython.noop),
+    ]
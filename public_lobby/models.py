@@ -1,6 +1,7 @@
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import MinValueValidator, MaxValueValidator
-from core.models import BaseLobbyModel, GameChoices, VibeChoices
+from core.models import BaseLobbyModel, GameChoices, VibeChoices, rank_ordinal
+from core import events
 from django.utils import timezone
 import uuid
 
@@ -22,6 +23,12 @@ class PublicLobby(BaseLobbyModel):
         max_length=20,
         help_text="Game-specific rank (validated in serializer)"
     )
+    rank_ordinal = models.PositiveSmallIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Position of rank on the game's ladder; null when unranked"
+    )
     vibe = models.CharField(
         max_length=20,
         choices=VibeChoices.choices
@@ -31,6 +38,10 @@ class PublicLobby(BaseLobbyModel):
         default=10,
         validators=[MinValueValidator(2), MaxValueValidator(10)]
     )
+    participant_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Denormalized; maintained by core.services join/leave"
+    )
     status = models.CharField(
         max_length=10,
         choices=LobbyStatus.choices,
@@ -48,12 +59,17 @@ class PublicLobby(BaseLobbyModel):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['game', 'status', 'created_at']),
+            models.Index(fields=['game', 'rank_ordinal', 'status']),
             models.Index(fields=['status', 'expires_at']),
         ]
 
     def __str__(self):
         return f"{self.game} • {self.rank} • {self.vibe}"
 
+    def save(self, *args, **kwargs):
+        self.rank_ordinal = rank_ordinal(self.game, self.rank)
+        super().save(*args, **kwargs)
+
     @property
     def display_title(self):
         """Generate human-readable title"""
@@ -61,32 +77,40 @@ class PublicLobby(BaseLobbyModel):
 
     @property
     def is_full(self):
-        return self.participants.count() >= self.max_participants
+        return self.participant_count >= self.max_participants
 
     @property
     def is_expired(self):
         return timezone.now() >= self.expires_at
 
-    def archive_and_delete(self):
-        """Archive stats and delete lobby"""
-        from public_lobby.models import ArchivedLobbyStats
-        
-        participant_count = self.participants.count()
-        
-        ArchivedLobbyStats.objects.create(
+    @property
+    def event_group(self):
+        return events.lobby_group('public', self.id)
+
+    def archive_record(self, expired_at):
+        """Unsaved analytics row for this lobby"""
+        return ArchivedLobbyStats(
             lobby_id=self.id,
             game=self.game,
             rank=self.rank,
             vibe=self.vibe,
-            total_participants=participant_count,
+            total_participants=self.participant_count,
             created_at=self.created_at,
-            expired_at=timezone.now(),
+            expired_at=expired_at,
             mic_required=self.mic_required,
             region=self.region,
         )
-        
-        self.participants.all().delete()
-        self.delete()
+
+    def archive_and_delete(self):
+        """Archive stats and delete lobby"""
+        with transaction.atomic():
+            self.archive_record(timezone.now()).save()
+            
+            self.status = LobbyStatus.EXPIRED
+            events.notify_lobby_changed(self, events.EXPIRE)
+            
+            self.participants.all().delete()
+            self.delete()
 
 
 class LobbyParticipant(models.Model):
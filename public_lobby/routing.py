@@ -0,0 +1,6 @@
+from django.urls import path
+from public_lobby.consumers import PublicLobbyConsumer
+
+websocket_urlpatterns = [
+    path('ws/public-lobbies/<uuid:key>/', PublicLobbyConsumer.as_asgi()),
+]
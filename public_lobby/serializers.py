@@ -1,8 +1,19 @@
 from rest_framework import serializers
+from django.db.models import BooleanField, ExpressionWrapper, F, Q
 from django.utils import timezone
 from datetime import timedelta
 from public_lobby.models import PublicLobby, LobbyParticipant
 from core.models import RANK_CHOICES_BY_GAME, GameChoices, VibeChoices
+from core.rows import ValuesRows
+
+GAME_LABELS = dict(GameChoices.choices)
+VIBE_LABELS = dict(VibeChoices.choices)
+
+# Set lookups for rank validation
+VALID_RANKS_BY_GAME = {
+    game: frozenset(value for value, _ in ranks)
+    for game, ranks in RANK_CHOICES_BY_GAME.items()
+}
 
 
 class LobbyParticipantSerializer(serializers.ModelSerializer):
@@ -15,7 +26,7 @@ class LobbyParticipantSerializer(serializers.ModelSerializer):
 class PublicLobbyListSerializer(serializers.ModelSerializer):
     """List view - minimal data"""
     display_title = serializers.CharField(read_only=True)
-    participant_count = serializers.SerializerMethodField()
+    participant_count = serializers.IntegerField(read_only=True)
     is_full = serializers.BooleanField(read_only=True)
     
     class Meta:
@@ -25,9 +36,41 @@ class PublicLobbyListSerializer(serializers.ModelSerializer):
             'mic_required', 'region', 'participant_count',
             'max_participants', 'is_full', 'status', 'created_at'
         ]
+
+
+class PublicLobbyListRows(ValuesRows):
+    """PublicLobbyListSerializer output from .values(); is_full is computed in SQL"""
+    columns = (
+        'id', 'game', 'rank', 'vibe', 'mic_required', 'region',
+        'participant_count', 'max_participants', 'is_full', 'status', 'created_at'
+    )
+    
+    @classmethod
+    def values(cls, queryset):
+        return super().values(queryset.annotate(is_full=ExpressionWrapper(
+            Q(participant_count__gte=F('max_participants')),
+            output_field=BooleanField()
+        )))
     
-    def get_participant_count(self, obj):
-        return obj.participants.count()
+    @classmethod
+    def row(cls, values, page):
+        game = values['game']
+        rank = values['rank']
+        vibe = values['vibe']
+        return {
+            'id': str(values['id']),
+            'display_title': f"{GAME_LABELS.get(game, game)} • {rank.title()} • {VIBE_LABELS.get(vibe, vibe)}",
+            'game': game,
+            'rank': rank,
+            'vibe': vibe,
+            'mic_required': values['mic_required'],
+            'region': values['region'],
+            'participant_count': values['participant_count'],
+            'max_participants': values['max_participants'],
+            'is_full': values['is_full'],
+            'status': values['status'],
+            'created_at': page.datetime(values['created_at']),
+        }
 
 
 class PublicLobbyDetailSerializer(serializers.ModelSerializer):
@@ -35,7 +78,7 @@ class PublicLobbyDetailSerializer(serializers.ModelSerializer):
     display_title = serializers.CharField(read_only=True)
     participants = LobbyParticipantSerializer(many=True, read_only=True)
     is_full = serializers.BooleanField(read_only=True)
-    participant_count = serializers.SerializerMethodField()
+    participant_count = serializers.IntegerField(read_only=True)
     
     class Meta:
         model = PublicLobby
@@ -46,9 +89,6 @@ class PublicLobbyDetailSerializer(serializers.ModelSerializer):
             'created_at', 'expires_at'
         ]
         read_only_fields = ['id', 'status', 'created_at']
-    
-    def get_participant_count(self, obj):
-        return obj.participants.count()
 
 
 class PublicLobbyCreateSerializer(serializers.ModelSerializer):
@@ -69,8 +109,8 @@ class PublicLobbyCreateSerializer(serializers.ModelSerializer):
         if game not in RANK_CHOICES_BY_GAME:
             raise serializers.ValidationError(f"Invalid game: {game}")
         
-        valid_ranks = [r[0] for r in RANK_CHOICES_BY_GAME[game]]
-        if rank not in valid_ranks:
+        if rank not in VALID_RANKS_BY_GAME[game]:
+            valid_ranks = [r[0] for r in RANK_CHOICES_BY_GAME[game]]
             raise serializers.ValidationError(
                 f"Invalid rank '{rank}' for game '{game}'. "
                 f"Valid ranks: {', '.join(valid_ranks)}"
@@ -85,28 +125,24 @@ class PublicLobbyCreateSerializer(serializers.ModelSerializer):
 
 
 class JoinLobbySerializer(serializers.Serializer):
-    """Join lobby with abuse protection"""
+    """Join payload; capacity and duplicate checks run in core.services.join_lobby"""
     nickname = serializers.CharField(max_length=50, required=False, allow_blank=True)
+
+
+# Largest party that can join together in one call
+MAX_PARTY_SIZE = 5
+
+
+class PartyMemberSerializer(serializers.Serializer):
+    nickname = serializers.CharField(max_length=50, required=False, allow_blank=True, default='')
+
+
+class JoinPartySerializer(serializers.Serializer):
+    """
+    Party join payload; the caller is the leader and the first member
     
-    def validate(self, data):
-        lobby = self.context['lobby']
-        anon_token = self.context['anon_token']
-        
-        # Check if lobby is full
-        if lobby.is_full:
-            raise serializers.ValidationError("Lobby is full")
-        
-        # Check if lobby is expired
-        if lobby.is_expired:
-            raise serializers.ValidationError("Lobby has expired")
-        
-        # Check if user already joined (abuse protection)
-        if LobbyParticipant.objects.filter(
-            lobby=lobby,
-            anon_token=anon_token
-        ).exists():
-            raise serializers.ValidationError(
-                "You have already joined this lobby"
-            )
-        
-        return data
\ No newline at end of file
+    Members carry nicknames only: their seats are derived from the
+    leader's identity (core.utils.party_seat_token), so a caller can
+    neither invent identities nor claim another player's.
+    """
+    members = PartyMemberSerializer(many=True, allow_empty=False, max_length=MAX_PARTY_SIZE)
@@ -0,0 +1,58 @@
+import uuid
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.dispatch import receiver
+
+from core import events
+from core.signals import lobby_changed
+from public_lobby.cache import invalidate_game
+from public_lobby.matchmaking import matchmaking_index
+from public_lobby.models import PublicLobby
+from public_lobby.serializers import PublicLobbyListSerializer
+
+# Channel layer group every browse stream subscribes to
+BROWSE_FEED_GROUP = 'public-lobbies.feed'
+
+# Lobby events as seen by the browse feed; full is already carried by the
+# status on the join update that filled the lobby
+FEED_EVENTS = {
+    events.CREATE: 'create',
+    events.JOIN: 'update',
+    events.LEAVE: 'update',
+    events.EXPIRE: 'delete',
+}
+
+
+@receiver(lobby_changed, sender=PublicLobby)
+def publish_to_browse_feed(sender, lobby, event, data, **kwargs):
+    """Fan public lobby changes out to the browse stream subscribers"""
+    kind = FEED_EVENTS.get(event)
+    channel_layer = get_channel_layer()
+    if kind is None or channel_layer is None:
+        return
+
+    row = PublicLobbyListSerializer(lobby).data
+    # Deleted lobbies have lost their primary key by now
+    row['id'] = data['lobby']['id']
+    async_to_sync(channel_layer.group_send)(
+        BROWSE_FEED_GROUP,
+        {"type": "browse.event", "event": kind, "lobby": row},
+    )
+
+
+@receiver(lobby_changed, sender=PublicLobby)
+def invalidate_list_cache(sender, lobby, event, **kwargs):
+    """Drop cached list pages for the lobby's game whenever it changes"""
+    if event in FEED_EVENTS:
+        invalidate_game(lobby.game)
+
+
+@receiver(lobby_changed, sender=PublicLobby)
+def sync_matchmaking_index(sender, lobby, event, data, **kwargs):
+    """Keep this process's quick-match index in step with lobby changes"""
+    if event == events.EXPIRE:
+        # Deleted lobbies have lost their primary key by now
+        matchmaking_index.discard(uuid.UUID(data['lobby']['id']))
+    else:
+        matchmaking_index.update(lobby)
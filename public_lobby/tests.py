@@ -1,3 +1,556 @@
-from django.test import TestCase
+import json
+from datetime import timedelta
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core.throttling import STORES
+from public_lobby.filters import browse_filters, matches_filters
+from public_lobby.matchmaking import matchmaking_index
+from public_lobby.models import PublicLobby, LobbyParticipant
+from public_lobby.serializers import PublicLobbyListRows, PublicLobbyListSerializer
+
+
+def make_lobby(**kwargs):
+    defaults = {
+        'game': 'valorant',
+        'rank': 'gold1',
+        'vibe': 'chill',
+        'max_participants': 10,
+        'expires_at': timezone.now() + timedelta(hours=24),
+    }
+    defaults.update(kwargs)
+    return PublicLobby.objects.create(**defaults)
+
+
+def add_participants(lobby, count):
+    for i in range(count):
+        LobbyParticipant.objects.create(lobby=lobby, anon_token=f"token-{lobby.pk}-{i}")
+    lobby.participant_count += count
+    PublicLobby.objects.filter(pk=lobby.pk).update(participant_count=lobby.participant_count)
+
+
+class PublicLobbyQueryCountTests(TestCase):
+    def setUp(self):
+        STORES['local'].clear()
+        cache.clear()
+        self.client = APIClient()
+
+    def test_list_query_count_is_independent_of_size(self):
+        for size in (3, 12):
+            PublicLobby.objects.all().delete()
+            cache.clear()
+            for _ in range(size):
+                add_participants(make_lobby(), 2)
+
+            # One COUNT for the paginator, one SELECT for the page
+            with self.assertNumQueries(2):
+                response = self.client.get(reverse('public-lobby-list'))
+
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['count'], size)
+            self.assertTrue(all(row['participant_count'] == 2 for row in response.json()['results']))
+
+    def test_detail_counts_and_prefetches_participants(self):
+        lobby = make_lobby(max_participants=3)
+        add_participants(lobby, 3)
+
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('public-lobby-detail', args=[lobby.pk]))
+
+        self.assertEqual(response.data['participant_count'], 3)
+        self.assertEqual(len(response.data['participants']), 3)
+        self.assertTrue(response.data['is_full'])
+
+    def test_detail_supports_conditional_get(self):
+        lobby = make_lobby()
+        url = reverse('public-lobby-detail', args=[lobby.pk])
+        etag = self.client.get(url)['ETag']
+
+        with self.assertNumQueries(1):
+            not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.client.post(reverse('public-lobby-join', args=[lobby.pk]))
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], etag)
+
+    def test_join_reports_updated_count(self):
+        lobby = make_lobby(max_participants=2)
+        add_participants(lobby, 1)
+
+        response = self.client.post(reverse('public-lobby-join', args=[lobby.pk]), {})
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['lobby']['participant_count'], 2)
+        self.assertTrue(response.data['lobby']['is_full'])
+        lobby.refresh_from_db()
+        self.assertEqual(lobby.status, 'full')
+
+    def test_leave_reopens_full_lobby(self):
+        lobby = make_lobby(max_participants=2)
+        add_participants(lobby, 1)
+        url = reverse('public-lobby-join', args=[lobby.pk])
+        self.client.post(url, {})
+
+        response = self.client.post(reverse('public-lobby-leave', args=[lobby.pk]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['lobby']['participant_count'], 1)
+        self.assertEqual(response.data['lobby']['status'], 'active')
+
+
+class PublicIdentityTests(TestCase):
+    def setUp(self):
+        STORES['local'].clear()
+        cache.clear()
+        self.client = APIClient()
+        self.lobby = make_lobby(max_participants=5)
+
+    def test_rotating_the_header_does_not_take_more_seats(self):
+        url = reverse('public-lobby-join', args=[self.lobby.pk])
+
+        first = self.client.post(url, {}, HTTP_X_ANON_TOKEN='one')
+        second = self.client.post(url, {}, HTTP_X_ANON_TOKEN='two')
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 400)
+        self.lobby.refresh_from_db()
+        self.assertEqual(self.lobby.participant_count, 1)
+
+
+class JoinPartyTests(TestCase):
+    def setUp(self):
+        STORES['local'].clear()
+        cache.clear()
+        self.client = APIClient()
+        self.lobby = make_lobby(max_participants=5)
+        self.url = reverse('public-lobby-join-party', args=[self.lobby.pk])
+
+    def party(self, *nicknames):
+        return {'members': [{'nickname': nickname} for nickname in nicknames]}
+
+    def test_party_joins_in_one_call(self):
+        add_participants(self.lobby, 1)
+
+        response = self.client.post(self.url, self.party('a', 'b', 'c', 'd'), format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data['participant_ids']), 4)
+        self.assertEqual(response.data['lobby']['participant_count'], 5)
+        self.assertEqual(len(response.data['lobby']['participants']), 5)
+        self.assertEqual(response.data['lobby']['status'], 'full')
+
+    def test_party_that_does_not_fit_is_refused_whole(self):
+        add_participants(self.lobby, 3)
+
+        response = self.client.post(self.url, self.party('a', 'b', 'c'), format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['non_field_errors'], ["Lobby does not have 3 open seats"])
+        self.lobby.refresh_from_db()
+        self.assertEqual(self.lobby.participant_count, 3)
+        self.assertEqual(self.lobby.participants.count(), 3)
+
+    def test_leader_already_in_lobby_rolls_back_the_party(self):
+        self.client.post(reverse('public-lobby-join', args=[self.lobby.pk]), {})
+
+        response = self.client.post(self.url, self.party('a', 'b'), format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.lobby.refresh_from_db()
+        self.assertEqual(self.lobby.participant_count, 1)
+        self.assertEqual(self.lobby.participants.count(), 1)
+
+    def test_seats_derive_from_the_leader_not_the_body(self):
+        LobbyParticipant.objects.create(lobby=self.lobby, anon_token='victim')
+        PublicLobby.objects.filter(pk=self.lobby.pk).update(participant_count=1)
+        body = {'members': [{'anon_token': 'victim', 'nickname': 'a'}, {'anon_token': 'made-up', 'nickname': 'b'}]}
+
+        self.assertEqual(self.client.post(self.url, body, format='json').status_code, 201)
+        # Same leader again collides with its own derived seats
+        self.assertEqual(self.client.post(self.url, self.party('a', 'b'), format='json').status_code, 400)
+
+        tokens = set(self.lobby.participants.values_list('anon_token', flat=True))
+        self.assertNotIn('made-up', tokens)
+        self.assertEqual(len(tokens), 3)
+
+    def test_leader_leaving_releases_the_party_seats(self):
+        add_participants(self.lobby, 1)
+        self.client.post(self.url, self.party('a', 'b', 'c', 'd'), format='json')
+
+        response = self.client.post(reverse('public-lobby-leave', args=[self.lobby.pk]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['lobby']['participant_count'], 1)
+        self.assertEqual(response.data['lobby']['status'], 'active')
+        self.assertEqual(self.lobby.participants.count(), 1)
+        # The party can come back once it has left
+        self.assertEqual(self.client.post(self.url, self.party('a', 'b'), format='json').status_code, 201)
+
+
+class AsyncReadTests(TestCase):
+    def setUp(self):
+        STORES['local'].clear()
+        cache.clear()
+        self.lobby = make_lobby()
+
+    async def test_list_and_ranks_are_served_async(self):
+        client = AsyncClient()
+
+        listed = await client.get(reverse('public-lobby-list'), {'cursor': ''})
+        ranks = await client.get(reverse('public-lobby-ranks'), {'game': 'apex'})
+
+        self.assertEqual([row['id'] for row in listed.json()['results']], [str(self.lobby.pk)])
+        self.assertEqual(listed['X-Cache'], 'MISS')
+        self.assertEqual(ranks.json()['ranks'][0], {'value': 'rookie', 'label': 'Rookie'})
+
+    def test_async_list_matches_the_viewset(self):
+        client = APIClient()
+        viewset = client.get('/api/public-lobbies.json')
+        cache.clear()
+        async_list = client.get(reverse('public-lobby-list'))
+
+        self.assertEqual(async_list.content, viewset.content)
+
+    @override_settings(DATABASE_REPLICAS=['replica'])
+    def test_cached_list_pages_are_read_from_the_primary(self):
+        # 'replica' is not a configured database, so reading from it would raise
+        client = APIClient()
+
+        self.assertEqual(client.get('/api/public-lobbies.json').status_code, 200)
+        self.assertEqual(client.get(reverse('public-lobby-list'), {'game': 'valorant'}).status_code, 200)
+
+    def test_create_is_delegated_to_the_viewset(self):
+        response = APIClient().post(
+            reverse('public-lobby-list'),
+            {'game': 'valorant', 'rank': 'gold', 'vibe': 'chill'}
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('non_field_errors', response.data)
+
+
+class PublicLobbyExpiryTests(TestCase):
+    def setUp(self):
+        STORES['local'].clear()
+        cache.clear()
+        self.client = APIClient()
+        self.live = make_lobby()
+        self.expired = make_lobby(expires_at=timezone.now() - timedelta(seconds=1))
+
+    def test_list_excludes_unswept_expired_lobbies(self):
+        response = self.client.get(reverse('public-lobby-list'))
+
+        self.assertEqual([row['id'] for row in response.json()['results']], [str(self.live.pk)])
+
+    def test_retrieve_and_join_treat_expired_lobbies_as_missing(self):
+        detail = self.client.get(reverse('public-lobby-detail', args=[self.expired.pk]))
+        join = self.client.post(reverse('public-lobby-join', args=[self.expired.pk]))
+
+        self.assertEqual(detail.status_code, 404)
+        self.assertEqual(join.status_code, 404)
+
+
+class RankWindowTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.lobbies = {rank: make_lobby(rank=rank) for rank in ('silver3', 'gold1', 'platinum3', 'diamond1')}
+        make_lobby(rank='unranked')
+        make_lobby(game='apex', rank='gold')
+
+    def test_create_stores_rank_ordinal(self):
+        self.assertEqual(self.lobbies['gold1'].rank_ordinal, 9)
+        self.assertIsNone(PublicLobby.objects.get(rank='unranked').rank_ordinal)
+
+    def test_list_filters_by_rank_window(self):
+        response = self.client.get(
+            reverse('public-lobby-list'),
+            {'game': 'valorant', 'rank_min': 'gold1', 'rank_max': 'platinum3'}
+        )
+
+        self.assertEqual(
+            sorted(row['rank'] for row in response.json()['results']),
+            ['gold1', 'platinum3']
+        )
+
+    def test_window_needs_a_game_and_ranked_bounds(self):
+        no_game = self.client.get(reverse('public-lobby-list'), {'rank_min': 'gold1'})
+        unranked = self.client.get(
+            reverse('public-lobby-list'),
+            {'game': 'valorant', 'rank_max': 'unranked'}
+        )
+
+        self.assertEqual(no_game.status_code, 400)
+        self.assertEqual(no_game.json(), {'rank_min': 'rank_min/rank_max require game'})
+        self.assertEqual(unranked.status_code, 400)
+
+    def test_stream_rows_match_the_same_window(self):
+        filters = browse_filters({'game': 'valorant', 'rank_min': 'gold1'})
+
+        self.assertTrue(matches_filters({'game': 'valorant', 'rank': 'diamond1'}, filters))
+        self.assertFalse(matches_filters({'game': 'valorant', 'rank': 'silver3'}, filters))
+        self.assertFalse(matches_filters({'game': 'valorant', 'rank': 'unranked'}, filters))
+
+
+class PublicLobbyPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        now = timezone.now()
+        # Two lobbies share a timestamp to exercise the id tie-breaker
+        self.lobbies = [make_lobby(created_at=now - timedelta(minutes=i // 2)) for i in range(7)]
+
+    def test_list_is_paginated(self):
+        response = self.client.get(reverse('public-lobby-list'), {'page_size': 3})
+
+        self.assertEqual(response.json()['count'], 7)
+        self.assertEqual(len(response.json()['results']), 3)
+        self.assertIsNotNone(response.json()['next'])
+
+    def test_cursor_pages_cover_every_lobby_once(self):
+        seen = []
+        url = reverse('public-lobby-list') + '?cursor=&page_size=3'
+        while url:
+            with self.assertNumQueries(1):
+                response = self.client.get(url)
+            self.assertNotIn('count', response.json())
+            seen.extend(row['id'] for row in response.json()['results'])
+            url = response.json()['next']
+
+        expected = sorted(self.lobbies, key=lambda lobby: (lobby.created_at, lobby.pk), reverse=True)
+        self.assertEqual(seen, [str(lobby.pk) for lobby in expected])
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get(reverse('public-lobby-list'), {'cursor': 'not-a-cursor'})
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_cached_links_carry_no_host_or_extra_params(self):
+        first = self.client.get(
+            reverse('public-lobby-list'), {'page_size': 3, 'utm': 'x'}, HTTP_HOST='localhost'
+        )
+        second = self.client.get(reverse('public-lobby-list'), {'page_size': 3})
+
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.json()['next'], reverse('public-lobby-list') + '?page=2&page_size=3')
+        self.assertEqual(first.json()['next'], second.json()['next'])
+
+    def test_unknown_game_is_rejected(self):
+        response = self.client.get(reverse('public-lobby-list'), {'game': 'not-a-game'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('game', response.json())
+
+
+class BrowseStreamTests(TestCase):
+    def setUp(self):
+        STORES['local'].clear()
+        cache.clear()
+        self.client = APIClient()
+        self.matching = make_lobby(rank='gold2')
+        make_lobby(game='apex', rank='gold')
+
+    def create(self, **data):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(reverse('public-lobby-list'), data)
+
+    async def read_event(self, chunks):
+        chunk = await anext(chunks)
+        if isinstance(chunk, bytes):
+            chunk = chunk.decode()
+        event, data = chunk.strip().split('\n')
+        return event.removeprefix('event: '), json.loads(data.removeprefix('data: '))
+
+    async def test_snapshot_then_matching_events(self):
+        response = await AsyncClient().get(reverse('public-lobby-stream'), {'game': 'valorant'})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = aiter(response.streaming_content)
+
+        event, rows = await self.read_event(chunks)
+        self.assertEqual(event, 'snapshot')
+        self.assertEqual([row['id'] for row in rows], [str(self.matching.pk)])
+
+        # A lobby for another game is filtered out of this stream
+        await sync_to_async(self.create)(game='apex', rank='gold', vibe='chill')
+        await sync_to_async(self.create)(game='valorant', rank='iron1', vibe='chill')
+
+        event, row = await self.read_event(chunks)
+        self.assertEqual(event, 'create')
+        self.assertEqual((row['game'], row['rank']), ('valorant', 'iron1'))
+        await chunks.aclose()
+
+
+class PublicLobbyListCacheTests(TestCase):
+    def setUp(self):
+        STORES['local'].clear()
+        cache.clear()
+        self.client = APIClient()
+        self.valorant = make_lobby(max_participants=5)
+        self.apex = make_lobby(game='apex', rank='gold')
+
+    def list(self, **params):
+        return self.client.get(reverse('public-lobby-list'), params)
+
+    def test_repeat_request_is_served_without_queries(self):
+        first = self.list(game='valorant', rank='gold1')
+
+        with self.assertNumQueries(0):
+            second = self.list(rank='gold1', game='valorant')
+
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.json(), first.json())
+
+    def test_join_invalidates_only_the_affected_game(self):
+        self.list(game='valorant')
+        self.list(game='apex')
+        self.list()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('public-lobby-join', args=[self.valorant.pk]))
+
+        valorant = self.list(game='valorant')
+        self.assertEqual(valorant['X-Cache'], 'MISS')
+        self.assertEqual(valorant.json()['results'][0]['participant_count'], 1)
+        self.assertEqual(self.list()['X-Cache'], 'MISS')
+        self.assertEqual(self.list(game='apex')['X-Cache'], 'HIT')
+
+    def test_stats_are_exposed_internally(self):
+        self.list(game='apex')
+        self.list(game='apex')
+
+        with self.settings(DEBUG=False, INTERNAL_API_TOKEN='secret'):
+            denied = self.client.get(reverse('internal-cache-stats'))
+            response = self.client.get(
+                reverse('internal-cache-stats'),
+                HTTP_X_INTERNAL_TOKEN='secret'
+            )
+
+        self.assertEqual(denied.status_code, 403)
+        self.assertGreaterEqual(response.data['public-lobbies']['hits'], 1)
+
+
+class QuickMatchTests(TestCase):
+    def setUp(self):
+        STORES['local'].clear()
+        cache.clear()
+        matchmaking_index.clear()
+        self.client = APIClient()
+        self.url = reverse('public-lobby-quick-match')
+
+    def match(self, **params):
+        return self.client.get(self.url, {'game': 'valorant', 'vibe': 'chill', **params})
+
+    def test_prefers_exact_rank_then_fullest_lobby(self):
+        make_lobby(rank='gold2')
+        emptier = make_lobby(rank='gold1')
+        fuller = make_lobby(rank='gold1')
+        add_participants(emptier, 1)
+        add_participants(fuller, 4)
+        make_lobby(rank='gold1', vibe='tryhard')
+
+        response = self.match(rank='gold1')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['lobby']['id'], str(fuller.pk))
+        self.assertEqual(response.data['rank_distance'], 0)
+
+    def test_unknown_vibe_and_long_region_are_rejected(self):
+        self.assertEqual(self.match(rank='gold1', vibe='made-up').status_code, 400)
+        self.assertEqual(self.match(rank='gold1', region='x' * 11).status_code, 400)
+        self.assertEqual(matchmaking_index._pools, {})
+
+    def test_region_is_matched_case_insensitively(self):
+        lobby = make_lobby(region='eu')
+
+        response = self.match(rank='gold1', region=' EU ')
+
+        self.assertEqual(response.data['lobby']['id'], str(lobby.pk))
+
+    def test_empty_pools_are_cached_and_pools_are_capped(self):
+        make_lobby(region='NA')
+        make_lobby(region='EU')
+
+        self.match(rank='gold1', region='ASIA')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.match(rank='gold1', region='ASIA').status_code, 404)
+
+        with self.settings(MATCHMAKING_MAX_POOLS=1):
+            self.match(rank='gold1', region='NA')
+            self.match(rank='gold1', region='EU')
+
+        self.assertEqual([key[1] for key in matchmaking_index._pools], ['EU'])
+
+    def test_window_widens_up_to_max_window(self):
+        lobby = make_lobby(rank='platinum1')
+
+        wide = self.match(rank='gold2')
+        narrow = self.match(rank='gold2', max_window=1)
+
+        self.assertEqual(wide.data['lobby']['id'], str(lobby.pk))
+        self.assertEqual(wide.data['rank_distance'], 2)
+        self.assertEqual(narrow.status_code, 404)
+
+    def test_unranked_only_matches_unranked(self):
+        make_lobby(rank='iron1')
+
+        self.assertEqual(self.match(rank='unranked').status_code, 404)
+
+    def test_index_follows_joins_and_serves_from_memory(self):
+        lobby = make_lobby(max_participants=2)
+        self.match(rank='gold1')
+
+        # Only the confirming lookup and the participant prefetch
+        with self.assertNumQueries(2):
+            self.assertEqual(self.match(rank='gold1').status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('public-lobby-join', args=[lobby.pk]))
+            self.client.post(
+                reverse('public-lobby-join', args=[lobby.pk]),
+                HTTP_USER_AGENT='second'
+            )
+
+        with self.assertNumQueries(0):
+            response = self.match(rank='gold1')
+        self.assertEqual(response.status_code, 404)
+
+    def test_stale_candidates_are_checked_against_the_database(self):
+        stale = make_lobby(rank='gold1')
+        fallback = make_lobby(rank='gold2')
+        self.match(rank='gold1')
+
+        # Filled by another worker; this process never saw the event
+        PublicLobby.objects.filter(pk=stale.pk).update(participant_count=10, status='full')
+
+        # One query confirms every candidate, one prefetches the winner
+        with self.assertNumQueries(2):
+            response = self.match(rank='gold1')
+
+        self.assertEqual(response.data['lobby']['id'], str(fallback.pk))
+        self.assertEqual(response.data['rank_distance'], 1)
+
+    def test_invalid_rank_is_rejected(self):
+        response = self.match(rank='gold')
+
+        self.assertEqual(response.status_code, 400)
+
+
+class ListRowsTests(TestCase):
+    def test_rows_render_identically_to_serializer(self):
+        make_lobby(game='apex', rank='apex_predator', vibe='tryhard', region='EU', mic_required=True)
+        full = make_lobby(max_participants=2)
+        add_participants(full, 2)
+        queryset = PublicLobby.objects.order_by('-created_at')
+        
+        rendered = JSONRenderer().render(PublicLobbyListSerializer(queryset, many=True).data)
+        
+        self.assertEqual(JSONRenderer().render(PublicLobbyListRows.many(PublicLobbyListRows.values(queryset))), rendered)
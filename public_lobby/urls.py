@@ -1,10 +1,16 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from public_lobby.views import PublicLobbyViewSet
+from public_lobby.async_views import browse_stream, lobby_list, lobby_ranks
 
 router = DefaultRouter()
 router.register(r'public-lobbies', PublicLobbyViewSet, basename='public-lobby')
 
 urlpatterns = [
+    # Ahead of the router so "stream" is not taken for a lobby id
+    path('public-lobbies/stream/', browse_stream, name='public-lobby-stream'),
+    # Async read paths; they shadow the router's routes of the same name
+    path('public-lobbies/', lobby_list, name='public-lobby-list'),
+    path('public-lobbies/ranks/', lobby_ranks, name='public-lobby-ranks'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
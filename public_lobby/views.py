@@ -1,30 +1,92 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.core.exceptions import ValidationError
+from django.db import DEFAULT_DB_ALIAS
 from django.shortcuts import get_object_or_404
-from public_lobby.models import PublicLobby, LobbyParticipant
+from public_lobby.models import PublicLobby
 from public_lobby.serializers import (
     PublicLobbyListSerializer,
+    PublicLobbyListRows,
     PublicLobbyDetailSerializer,
     PublicLobbyCreateSerializer,
-    JoinLobbySerializer
+    JoinLobbySerializer,
+    JoinPartySerializer,
+    MAX_PARTY_SIZE,
+    VALID_RANKS_BY_GAME
 )
-from core.utils import generate_anon_token, get_client_ip, get_user_agent
-from core.models import RANK_CHOICES_BY_GAME
+from core.models import RANK_CHOICES_BY_GAME, VibeChoices
+from core.catalog import catalog
+from core.conditional import if_none_match, with_etag
+from core.services import join_lobby, join_party, leave_lobby
+from core.throttling import TokenBucketThrottle
+from core.utils import party_seat_token
+from core import events
+from public_lobby.cache import ListPagination, list_cache, list_cache_parts, list_scope
+from public_lobby.filters import browse_filters
+from public_lobby import matchmaking
+
+
+def lobby_etag(request, pk=None):
+    """Version lookup for conditional GETs; one indexed query, no serialization"""
+    try:
+        version = (
+            PublicLobby.objects.live()
+            .filter(pk=pk, status='active')
+            .values_list('version', flat=True)
+            .first()
+        )
+    except ValidationError:
+        return None
+    return None if version is None else lobby_tag(pk, version)
+
+
+def lobby_tag(lobby_id, version):
+    return f"{lobby_id}-{version}"
+
+
+def rank_options(game):
+    """Payload and status for the ranks endpoint, shared with its async version"""
+    if not game:
+        return {"error": "game parameter is required"}, status.HTTP_400_BAD_REQUEST
+    
+    if game not in RANK_CHOICES_BY_GAME:
+        return (
+            {"error": f"Invalid game. Valid games: {', '.join(RANK_CHOICES_BY_GAME.keys())}"},
+            status.HTTP_400_BAD_REQUEST
+        )
+    
+    # Sliced from the catalog built at startup
+    game_entry = next(entry for entry in catalog.games if entry["value"] == game)
+    return {"game": game, "ranks": game_entry["ranks"]}, status.HTTP_200_OK
 
 
 class PublicLobbyViewSet(viewsets.ModelViewSet):
     """
     ViewSet for Public Lobbies
     
-    list: Get all active lobbies
+    list: Get active lobbies, paginated (?page=N, or ?cursor= for keyset pages)
+          filters: game, rank, vibe, mic_required, rank_min/rank_max (with game)
+          GET is served by async_views.lobby_list under ASGI
+    stream: Server-Sent Events browse feed (GET /public-lobbies/stream/, see async_views)
     retrieve: Get specific lobby details
     create: Create new lobby
     join: Join a lobby (POST /lobbies/{id}/join/)
+    join_party: Join a lobby as a party (POST /lobbies/{id}/join-party/)
     leave: Leave a lobby (POST /lobbies/{id}/leave/)
-    ranks: Get valid ranks for a game (GET /lobbies/ranks/?game=valorant)
+    ranks: Get valid ranks for a game (GET /lobbies/ranks/?game=valorant, async_views.lobby_ranks)
+    quick_match: Best open lobby near a rank (GET /lobbies/quick-match/)
+    
+    create, join and join_party draw on per-caller token buckets (core.throttling)
     """
     queryset = PublicLobby.objects.filter(status='active')
+    pagination_class = ListPagination
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scopes = {
+        'create': 'lobby-create',
+        'join': 'lobby-join',
+        'join_party': 'lobby-join',
+    }
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -33,33 +95,55 @@ class PublicLobbyViewSet(viewsets.ModelViewSet):
             return PublicLobbyCreateSerializer
         return PublicLobbyDetailSerializer
     
+    def get_queryset(self):
+        """Prefetch participants for detail views"""
+        if self.action == 'leave':
+            # Leaving is what reopens a full lobby
+            return PublicLobby.objects.filter(status__in=['active', 'full'])
+        # Expiry is filtered in SQL, served by the (status, expires_at) index
+        queryset = super().get_queryset().live()
+        if self.action in ('join', 'join_party'):
+            # The join services refresh the lobby after the write
+            return queryset
+        queryset = queryset.order_by('-created_at', '-id')
+        if self.action not in ('list', 'create'):
+            queryset = queryset.prefetch_related('participants')
+        return queryset
+    
+    @if_none_match(lobby_etag)
+    def retrieve(self, request, *args, **kwargs):
+        """Lobby details; 304 Not Modified when If-None-Match is current"""
+        lobby = self.get_object()
+        serializer = self.get_serializer(lobby)
+        return with_etag(Response(serializer.data), lobby_tag(lobby.pk, lobby.version))
+    
+    def perform_create(self, serializer):
+        lobby = serializer.save()
+        events.notify_lobby_changed(lobby, events.CREATE)
+    
     def list(self, request, *args, **kwargs):
-        """List active lobbies with filtering"""
-        queryset = self.get_queryset()
-        
-        # Filter by game
-        game = request.query_params.get('game')
-        if game:
-            queryset = queryset.filter(game=game)
-        
-        # Filter by rank
-        rank = request.query_params.get('rank')
-        if rank:
-            queryset = queryset.filter(rank=rank)
-        
-        # Filter by vibe
-        vibe = request.query_params.get('vibe')
-        if vibe:
-            queryset = queryset.filter(vibe=vibe)
-        
-        # Filter by mic requirement
-        mic_required = request.query_params.get('mic_required')
-        if mic_required is not None:
-            mic_bool = mic_required.lower() == 'true'
-            queryset = queryset.filter(mic_required=mic_bool)
-        
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        """List active lobbies with filtering, cached per game"""
+        filters = browse_filters(request.query_params)
+        scope = list_scope(filters)
+        cache_parts = list_cache_parts(filters, request.query_params)
+        
+        cached = list_cache.get(scope, cache_parts)
+        if cached is not None:
+            return Response(cached, headers={'X-Cache': 'HIT'})
+        
+        # Plain rows rather than model instances; see PublicLobbyListRows.
+        # Read from the primary: a lagging replica would cache pre-write rows
+        # under the generation the write just bumped.
+        queryset = PublicLobbyListRows.values(
+            self.get_queryset().using(DEFAULT_DB_ALIAS).filter(**filters)
+        )
+        
+        page = self.paginate_queryset(queryset)
+        response = self.get_paginated_response(PublicLobbyListRows.many(page))
+        
+        list_cache.set(scope, cache_parts, response.data)
+        response['X-Cache'] = 'MISS'
+        return response
     
     @action(detail=False, methods=['get'])
     def ranks(self, request):
@@ -67,11 +151,27 @@ class PublicLobbyViewSet(viewsets.ModelViewSet):
         Get valid ranks for a specific game
         Usage: GET /api/lobbies/ranks/?game=valorant
         """
-        game = request.query_params.get('game')
+        data, status_code = rank_options(request.query_params.get('game'))
+        return Response(data, status=status_code)
+    
+    @action(detail=False, methods=['get'], url_path='quick-match')
+    def quick_match(self, request):
+        """
+        Find the best open lobby for a player
+        Usage: GET /api/public-lobbies/quick-match/?game=valorant&rank=gold2&vibe=chill
+        Optional: region, mic_required, max_window (rank steps, default 3)
         
-        if not game:
+        Served from the in-process matchmaking index; the pick is checked
+        against the database before it is returned.
+        """
+        params = request.query_params
+        game = params.get('game')
+        rank = params.get('rank')
+        vibe = params.get('vibe')
+        
+        if not game or not rank or not vibe:
             return Response(
-                {"error": "game parameter is required"},
+                {"error": "game, rank and vibe parameters are required"},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
@@ -81,12 +181,52 @@ class PublicLobbyViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        ranks = [
-            {"value": rank[0], "label": rank[1]}
-            for rank in RANK_CHOICES_BY_GAME[game]
-        ]
+        if rank not in VALID_RANKS_BY_GAME[game]:
+            return Response(
+                {"error": f"Invalid rank '{rank}' for game '{game}'"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if vibe not in VibeChoices.values:
+            return Response(
+                {"error": f"Invalid vibe. Valid vibes: {', '.join(VibeChoices.values)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        region = matchmaking.normalize_region(params.get('region'))
+        if len(region) > matchmaking.MAX_REGION_LENGTH:
+            return Response(
+                {"error": f"region must be at most {matchmaking.MAX_REGION_LENGTH} characters"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        return Response({"game": game, "ranks": ranks})
+        try:
+            max_window = int(params.get('max_window', matchmaking.MAX_RANK_WINDOW))
+        except ValueError:
+            return Response(
+                {"error": "max_window must be an integer"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        lobby, distance = matchmaking.quick_match(
+            game,
+            region,
+            vibe,
+            params.get('mic_required', 'false').lower() == 'true',
+            rank,
+            max_window=max(0, min(max_window, matchmaking.MAX_RANK_WINDOW))
+        )
+        
+        if lobby is None:
+            return Response(
+                {"error": "No open lobby found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        return Response({
+            "rank_distance": distance,
+            "lobby": PublicLobbyDetailSerializer(lobby).data
+        })
     
     @action(detail=True, methods=['post'])
     def join(self, request, pk=None):
@@ -96,30 +236,16 @@ class PublicLobbyViewSet(viewsets.ModelViewSet):
         """
         lobby = self.get_object()
         
-        # Generate anon_token from IP + User Agent
-        ip = get_client_ip(request)
-        user_agent = get_user_agent(request)
-        anon_token = generate_anon_token(ip, user_agent)
-        
-        # Validate
-        serializer = JoinLobbySerializer(
-            data=request.data,
-            context={'lobby': lobby, 'anon_token': anon_token}
-        )
+        serializer = JoinLobbySerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
-        # Create participant
-        participant = LobbyParticipant.objects.create(
-            lobby=lobby,
-            anon_token=anon_token,
+        # Seats follow the server-side fingerprint, not the X-ANON-TOKEN header
+        participant = join_lobby(
+            lobby,
+            request.client_fingerprint,
             nickname=serializer.validated_data.get('nickname', '')
         )
         
-        # Update lobby status if full
-        if lobby.is_full:
-            lobby.status = 'full'
-            lobby.save()
-        
         return Response(
             {
                 "message": "Successfully joined lobby",
@@ -129,42 +255,61 @@ class PublicLobbyViewSet(viewsets.ModelViewSet):
             status=status.HTTP_201_CREATED
         )
     
+    @action(detail=True, methods=['post'], url_path='join-party')
+    def join_party(self, request, pk=None):
+        """
+        Join a lobby together as a party; everyone gets a seat or nobody does
+        Body: {"members": [{"nickname": "Leader"}, {"nickname": "PlayerName"}, ...]}
+        
+        The caller is the leader and takes the first seat; the other seats
+        are derived from the leader's fingerprint.
+        """
+        lobby = self.get_object()
+        
+        serializer = JoinPartySerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        # One capacity check and one bulk insert for the whole party
+        participants = join_party(
+            lobby,
+            [
+                (party_seat_token(request.client_fingerprint, index), member['nickname'])
+                for index, member in enumerate(serializer.validated_data['members'])
+            ]
+        )
+        
+        return Response(
+            {
+                "message": f"Party of {len(participants)} joined lobby",
+                "participant_ids": [participant.id for participant in participants],
+                "lobby": PublicLobbyDetailSerializer(lobby).data
+            },
+            status=status.HTTP_201_CREATED
+        )
+    
     @action(detail=True, methods=['post'])
     def leave(self, request, pk=None):
         """
         Leave a lobby
-        Uses anon_token to identify participant
+        Uses the client fingerprint (IP + User Agent) to identify participant;
+        a party leader's derived seats (see join_party) are released too
         """
         lobby = self.get_object()
         
-        # Generate anon_token
-        ip = get_client_ip(request)
-        user_agent = get_user_agent(request)
-        anon_token = generate_anon_token(ip, user_agent)
-        
-        # Find and delete participant
-        try:
-            participant = LobbyParticipant.objects.get(
-                lobby=lobby,
-                anon_token=anon_token
-            )
-            participant.delete()
-            
-            # Update lobby status if no longer full
-            if lobby.status == 'full' and not lobby.is_full:
-                lobby.status = 'active'
-                lobby.save()
-            
-            return Response(
-                {
-                    "message": "Successfully left lobby",
-                    "lobby": PublicLobbyDetailSerializer(lobby).data
-                },
-                status=status.HTTP_200_OK
-            )
-        
-        except LobbyParticipant.DoesNotExist:
+        party_tokens = [
+            party_seat_token(request.client_fingerprint, index)
+            for index in range(1, MAX_PARTY_SIZE)
+        ]
+        if not leave_lobby(lobby, request.client_fingerprint, party_tokens):
             return Response(
                 {"error": "You are not in this lobby"},
                 status=status.HTTP_404_NOT_FOUND
             )
+        
+        return Response(
+            {
+                "message": "Successfully left lobby",
+                "lobby": PublicLobbyDetailSerializer(lobby).data
+            },
+            status=status.HTTP_200_OK
+        )